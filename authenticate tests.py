@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .models import CustomUser
+from .throttling import ACCOUNT_CAPACITY, THROTTLE_CACHE, check_login, throttle_counters
+
+
+class LoginHashCountTests(TestCase):
+    """Every login attempt should verify the password exactly once."""
+
+    def setUp(self):
+        caches[THROTTLE_CACHE].clear()
+        self.user = CustomUser.objects.create_user(username='collector1', password='s3cret-pass', role=1)
+
+    def _login(self, password):
+        check_password = CustomUser.check_password
+        with mock.patch.object(
+            CustomUser, 'check_password', autospec=True, side_effect=check_password,
+        ) as counted:
+            response = self.client.post(
+                reverse('authentication:login'), {'username': 'collector1', 'password': password},
+            )
+        return response, counted.call_count
+
+    def test_successful_login_hashes_once(self):
+        response, hashes = self._login('s3cret-pass')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(hashes, 1)
+
+    def test_failed_login_hashes_once(self):
+        response, hashes = self._login('wrong-pass')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hashes, 1)
+
+
+class DistributedLoginThrottleTests(TestCase):
+    """Guesses at one account from many addresses are throttled without locking anyone out."""
+
+    def setUp(self):
+        caches[THROTTLE_CACHE].clear()
+
+    def _attempt(self, username, ip):
+        return check_login(RequestFactory().post('/', REMOTE_ADDR=ip), username)
+
+    def test_account_is_throttled_across_addresses(self):
+        for i in range(ACCOUNT_CAPACITY):
+            self.assertEqual(self._attempt('collector1', f'10.0.{i // 250}.{i % 250 + 1}'), 0)
+
+        self.assertGreater(self._attempt('Collector1', '192.168.1.1'), 0)
+        # Other accounts from the same addresses are unaffected
+        self.assertEqual(self._attempt('collector2', '10.0.0.1'), 0)
+
+    def test_account_throttle_is_not_a_lockout(self):
+        for i in range(ACCOUNT_CAPACITY + 1):
+            self._attempt('collector1', f'10.0.{i // 250}.{i % 250 + 1}')
+
+        self.assertEqual(throttle_counters()['lockouts'], 0)
@@ -0,0 +1,125 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Each key may make CAPACITY attempts per sliding window of CAPACITY * REFILL_SECONDS
+# (on average one attempt every REFILL_SECONDS). Going over on a username from one
+# IP locks that (username, IP) pair out for LOCKOUT_SECONDS. The IP limit and the
+# limit on a username across all IPs only throttle, so neither a shared address nor
+# the owner of an account under a distributed attack is ever locked out as a whole.
+USERNAME_CAPACITY = getattr(settings, 'LOGIN_THROTTLE_USERNAME_CAPACITY', 5)
+USERNAME_REFILL_SECONDS = getattr(settings, 'LOGIN_THROTTLE_USERNAME_REFILL_SECONDS', 60)
+ACCOUNT_CAPACITY = getattr(settings, 'LOGIN_THROTTLE_ACCOUNT_CAPACITY', 20)
+ACCOUNT_REFILL_SECONDS = getattr(settings, 'LOGIN_THROTTLE_ACCOUNT_REFILL_SECONDS', 30)
+IP_CAPACITY = getattr(settings, 'LOGIN_THROTTLE_IP_CAPACITY', 30)
+IP_REFILL_SECONDS = getattr(settings, 'LOGIN_THROTTLE_IP_REFILL_SECONDS', 2)
+LOCKOUT_SECONDS = getattr(settings, 'LOGIN_THROTTLE_LOCKOUT_SECONDS', 900)
+THROTTLE_CACHE = getattr(settings, 'LOGIN_THROTTLE_CACHE', 'default')
+
+# Where the client address comes from. Behind a proxy set e.g. 'HTTP_X_FORWARDED_FOR'
+# and the number of proxies that append to it; the address they saw is used.
+IP_HEADER = getattr(settings, 'LOGIN_THROTTLE_IP_HEADER', 'REMOTE_ADDR')
+TRUSTED_PROXIES = getattr(settings, 'LOGIN_THROTTLE_TRUSTED_PROXIES', 1)
+
+COUNTERS = ('allowed', 'throttled', 'lockouts')
+
+
+def _cache():
+    return caches[THROTTLE_CACHE]
+
+
+def _key(scope, value):
+    # Hashed so arbitrary usernames are always valid cache keys
+    digest = hashlib.sha256(value.encode('utf-8')).hexdigest()[:32]
+    return f'login-throttle:{scope}:{digest}'
+
+
+def _incr(key, timeout):
+    """Atomically add one to the counter at key, creating it if needed; returns the new value."""
+    cache = _cache()
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _count(name):
+    _incr(f'login-throttle:count:{name}', None)
+
+
+def _hit(key, capacity, window, now):
+    """
+    Count one attempt at key. The rate is the current fixed window's count plus the
+    overlapping share of the previous window's, so only atomic add/incr writes are
+    needed. Returns 0 if the attempt is within capacity, else the seconds to wait.
+    """
+    slot = int(now // window)
+    current = _incr(f'{key}:{slot}', int(window * 2) + 1)
+    previous = _cache().get(f'{key}:{slot - 1}', 0)
+    elapsed = now - slot * window
+    if previous * (1 - elapsed / window) + current <= capacity:
+        return 0
+    return window - elapsed
+
+
+def client_ip(request):
+    value = request.META.get(IP_HEADER) or request.META.get('REMOTE_ADDR', '')
+    addresses = [part.strip() for part in value.split(',') if part.strip()]
+    if not addresses:
+        return ''
+    # The rightmost entries were added by our own proxies; anything left of them is client supplied
+    return addresses[-min(max(TRUSTED_PROXIES, 1), len(addresses))]
+
+
+def normalize_username(username):
+    return (username or '').strip().lower()
+
+
+def _user_key(request, username):
+    return _key('user', f'{normalize_username(username)}|{client_ip(request)}')
+
+
+def check_login(request, username):
+    """
+    Charge one login attempt to the client's IP, to the username across all IPs and
+    to the (username, IP) pair. Call before the form is validated so throttled
+    requests never reach the hasher.
+    Returns 0 when the attempt may go ahead, otherwise the seconds until it may.
+    """
+    now = time.time()
+    wait = _hit(_key('ip', client_ip(request)), IP_CAPACITY, IP_CAPACITY * IP_REFILL_SECONDS, now)
+    name = normalize_username(username)
+    if not wait and name:
+        key = _user_key(request, username)
+        locked_until = _cache().get(f'{key}:lock', 0)
+        if locked_until > now:
+            wait = locked_until - now
+        else:
+            # Guesses spread over many addresses each stay under the pair limit
+            wait = _hit(_key('account', name), ACCOUNT_CAPACITY, ACCOUNT_CAPACITY * ACCOUNT_REFILL_SECONDS, now)
+            if not wait and _hit(key, USERNAME_CAPACITY, USERNAME_CAPACITY * USERNAME_REFILL_SECONDS, now):
+                if _cache().add(f'{key}:lock', now + LOCKOUT_SECONDS, LOCKOUT_SECONDS):
+                    _count('lockouts')
+                wait = LOCKOUT_SECONDS
+    _count('throttled' if wait else 'allowed')
+    return int(wait + 0.999)
+
+
+def reset_username(request, username):
+    """Clear the (username, IP) counters and lockout after a successful login."""
+    key = _user_key(request, username)
+    slot = int(time.time() // (USERNAME_CAPACITY * USERNAME_REFILL_SECONDS))
+    _cache().delete_many([f'{key}:lock', f'{key}:{slot}', f'{key}:{slot - 1}'])
+
+
+def throttle_counters():
+    """{'allowed', 'throttled', 'lockouts'} attempt counts since the cache was last cleared."""
+    values = _cache().get_many([f'login-throttle:count:{name}' for name in COUNTERS])
+    return {name: values.get(f'login-throttle:count:{name}', 0) for name in COUNTERS}
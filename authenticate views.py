@@ -1,10 +1,12 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm
 from .forms import CustomUserCreationForm
 from django.contrib.auth import logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from .throttling import check_login, reset_username, throttle_counters
 
 
 # Create your views here.
@@ -27,23 +29,29 @@ def register_user(request):
 
 def login_user(request):
     if request.method == 'POST':
+        username = request.POST.get('username', '')
+        wait = check_login(request, username)
+        if wait:
+            messages.error(request, 'Too many login attempts. Please try again later.')
+            form = AuthenticationForm(request, initial={'username': username})
+            response = render(request, 'login.html', {'form': form}, status=429)
+            response['Retry-After'] = str(wait)
+            return response
+
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
-            user = authenticate(
-                username=form.cleaned_data['username'],
-                password=form.cleaned_data['password']
-            )
-
-            if user is not None:
-                login(request, user)
-                if user.is_superuser or user.role == 2:
-                    return redirect('super_admin_dashboard:super_admin_dashboard')
-                elif user.role == 1:
-                    return redirect('waste_collector:waste_collector_dashboard')
-                elif user.role == 3:
-                    return redirect('admin_dashboard:admin_dashboard')
-                else:
-                    return redirect('customer:customer_dashboard')
+            # is_valid() has already authenticated (and hashed) once; reuse that user
+            user = form.get_user()
+            reset_username(request, username)
+            login(request, user)
+            if user.is_superuser or user.role == 2:
+                return redirect('super_admin_dashboard:super_admin_dashboard')
+            elif user.role == 1:
+                return redirect('waste_collector:waste_collector_dashboard')
+            elif user.role == 3:
+                return redirect('admin_dashboard:admin_dashboard')
+            else:
+                return redirect('customer:customer_dashboard')
         messages.error(request, 'Invalid username or password.')
     else:
         form = AuthenticationForm()
@@ -57,3 +65,10 @@ def logout_user(request):
     logout(request)
     messages.success(request, "You have been logged out.")
     return redirect('authentication:login')
+
+
+# Login throttle counters for monitoring
+@login_required
+@user_passes_test(lambda u: u.is_superuser)
+def login_throttle_status(request):
+    return JsonResponse(throttle_counters())
@@ -0,0 +1,141 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from authentication.models import CustomUser
+from waste_collector_dashboard.models import PickupSlot
+from waste_collector_dashboard.stats import invalidate_collector_stats
+from .models import CustomerPickupDate, CustomerWasteInfo
+
+
+class SlotFull(Exception):
+    """The chosen pickup date (or the ward's share of it) has no capacity left."""
+
+
+def _lock(queryset):
+    """SELECT ... FOR UPDATE the rows of queryset, in primary key order."""
+    list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+
+def _ward(value):
+    # Wards arrive as ints from the model and strings from forms
+    return str(value) if value else ''
+
+
+def _slot_ids(calendar_id, ward):
+    """Slots covering a date for a ward: the date-wide slot and, if any, the ward's own."""
+    wards = [''] if not ward else ['', ward]
+    return list(
+        PickupSlot.objects.filter(calendar_id=calendar_id, ward__in=wards).values_list('id', flat=True)
+    )
+
+
+def booked_pickups(calendar_id, ward=''):
+    """Pickups on a date that a slot for ward would cover ('' counts the whole date)."""
+    pickups = CustomerPickupDate.objects.filter(localbody_calendar_id=calendar_id)
+    if ward:
+        pickups = pickups.filter(waste_info__ward=ward)
+    return pickups.count()
+
+
+def _move(release, reserve):
+    """
+    Give back one place on each slot in release and take one on each slot in reserve
+    (Counters of slot ids; a slot in both is left alone). Every slot row involved is
+    locked first, in id order, so concurrent moves in opposite directions cannot
+    deadlock. Raises SlotFull if any slot to reserve is full. Must run in a transaction.
+    """
+    net_release = release - reserve
+    net_reserve = reserve - release
+    involved = sorted(set(net_release) | set(net_reserve))
+    if not involved:
+        return
+    _lock(PickupSlot.objects.filter(id__in=involved))
+
+    for slot_id, places in net_reserve.items():
+        taken = PickupSlot.objects.filter(pk=slot_id, booked__lte=F('capacity') - places).update(
+            booked=F('booked') + places
+        )
+        if not taken:
+            raise SlotFull(slot_id)
+    for slot_id, places in net_release.items():
+        PickupSlot.objects.filter(pk=slot_id).update(booked=Greatest(F('booked') - places, 0))
+
+
+def _slots(pickups, ward):
+    counts = Counter()
+    for pickup in pickups:
+        counts.update(_slot_ids(pickup.localbody_calendar_id, ward))
+    return counts
+
+
+def _invalidate_stats(waste_info):
+    # The assigned collector's pending pickups count depends on the profile's booked dates
+    if waste_info is not None and waste_info.assigned_collector_id:
+        collector_id = waste_info.assigned_collector_id
+        transaction.on_commit(lambda: invalidate_collector_stats(collector_id))
+
+
+def book_pickup(user, calendar, waste_info=None, previous_ward=None):
+    """
+    Point a waste profile's pickup (or, without waste_info, the user's pickup that is
+    not tied to any profile) at calendar, moving the reservation from its previous
+    date and ward. previous_ward is the ward the existing reservation was made for,
+    when the profile's ward has just been changed. Returns (pickup, created).
+    Raises SlotFull without changing anything when the date is full.
+    """
+    ward = _ward(waste_info.ward) if waste_info is not None else ''
+    old_ward = ward if previous_ward is None else _ward(previous_ward)
+
+    with transaction.atomic():
+        # Lock the owner first so two first bookings for it cannot both insert
+        if waste_info is not None:
+            _lock(CustomerWasteInfo.objects.filter(pk=waste_info.pk))
+            lookup = {'waste_info': waste_info}
+        else:
+            _lock(CustomUser.objects.filter(pk=user.pk))
+            lookup = {'user': user, 'waste_info__isnull': True}
+
+        current = list(CustomerPickupDate.objects.filter(**lookup).order_by('id'))
+        if len(current) == 1 and current[0].localbody_calendar_id == calendar.id and old_ward == ward:
+            return current[0], False
+
+        _move(_slots(current, old_ward), Counter(_slot_ids(calendar.id, ward)))
+        _invalidate_stats(waste_info)
+
+        if current:
+            pickup = current[0]
+            pickup.localbody_calendar = calendar
+            pickup.save(update_fields=['localbody_calendar'])
+            CustomerPickupDate.objects.filter(pk__in=[p.pk for p in current[1:]]).delete()
+            return pickup, False
+
+        pickup = CustomerPickupDate.objects.create(
+            user=user, waste_info=waste_info, localbody_calendar=calendar
+        )
+        return pickup, True
+
+
+def change_ward(waste_info, previous_ward):
+    """
+    Move the reservations of a profile's existing pickups from previous_ward to its
+    current ward. Raises SlotFull (changing nothing) if the new ward's slot is full.
+    """
+    if _ward(previous_ward) == _ward(waste_info.ward):
+        return
+    with transaction.atomic():
+        _lock(CustomerWasteInfo.objects.filter(pk=waste_info.pk))
+        current = list(CustomerPickupDate.objects.filter(waste_info=waste_info))
+        _move(_slots(current, _ward(previous_ward)), _slots(current, _ward(waste_info.ward)))
+
+
+def cancel_pickups(waste_info):
+    """Release the places held by a profile's pickups and delete them."""
+    with transaction.atomic():
+        _lock(CustomerWasteInfo.objects.filter(pk=waste_info.pk))
+        current = list(CustomerPickupDate.objects.filter(waste_info=waste_info))
+        _move(_slots(current, _ward(waste_info.ward)), Counter())
+        CustomerPickupDate.objects.filter(pk__in=[p.pk for p in current]).delete()
+        _invalidate_stats(waste_info)
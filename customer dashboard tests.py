@@ -0,0 +1,89 @@
+import threading
+from datetime import date
+from unittest import skipUnless
+
+from django.db import close_old_connections, connection
+from django.test import TransactionTestCase
+
+from authentication.models import CustomUser
+from super_admin_dashboard.models import District, LocalBody, LocalBodyCalendar, State
+from waste_collector_dashboard.models import PickupSlot
+from .booking import SlotFull, book_pickup
+from .models import CustomerPickupDate
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Many customers booking the same date at once must never overbook its slot."""
+
+    CAPACITY = 5
+    CUSTOMERS = 20
+
+    def setUp(self):
+        state = State.objects.create(name='Kerala')
+        district = District.objects.create(state=state, name='Thrissur')
+        localbody = LocalBody.objects.create(district=district, name='Thrissur Corporation')
+        self.calendar = LocalBodyCalendar.objects.create(localbody=localbody, date=date(2030, 1, 7))
+        self.other_calendar = LocalBodyCalendar.objects.create(localbody=localbody, date=date(2030, 1, 8))
+        self.slot = PickupSlot.objects.create(calendar=self.calendar, capacity=self.CAPACITY)
+        self.other_slot = PickupSlot.objects.create(calendar=self.other_calendar, capacity=self.CAPACITY)
+        self.users = [
+            CustomUser.objects.create_user(username=f'customer{i}', password='x', role=0)
+            for i in range(self.CUSTOMERS)
+        ]
+
+    def _book_all(self, calendar):
+        results = []
+        barrier = threading.Barrier(len(self.users))
+
+        def book(user):
+            close_old_connections()
+            try:
+                barrier.wait()
+                book_pickup(user, calendar)
+                results.append('booked')
+            except SlotFull:
+                results.append('full')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    # SQLite locks the whole database, so concurrent writers fail instead of queueing
+    @skipUnless(connection.vendor == 'postgresql', 'needs row-level locking')
+    def test_concurrent_bookings_fill_exactly_the_capacity(self):
+        results = self._book_all(self.calendar)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(results.count('booked'), self.CAPACITY)
+        self.assertEqual(results.count('full'), self.CUSTOMERS - self.CAPACITY)
+        self.assertEqual(self.slot.booked, self.CAPACITY)
+        self.assertEqual(
+            self.slot.booked,
+            CustomerPickupDate.objects.filter(localbody_calendar=self.calendar).count(),
+        )
+
+    def test_moving_a_booking_releases_the_old_date(self):
+        user = self.users[0]
+        book_pickup(user, self.calendar)
+        book_pickup(user, self.other_calendar)
+
+        self.slot.refresh_from_db()
+        self.other_slot.refresh_from_db()
+        self.assertEqual((self.slot.booked, self.other_slot.booked), (0, 1))
+
+    def test_full_date_rejects_without_changes(self):
+        for user in self.users[:self.CAPACITY]:
+            book_pickup(user, self.calendar)
+        book_pickup(self.users[-1], self.other_calendar)
+
+        with self.assertRaises(SlotFull):
+            book_pickup(self.users[-1], self.calendar)
+
+        self.slot.refresh_from_db()
+        self.other_slot.refresh_from_db()
+        self.assertEqual((self.slot.booked, self.other_slot.booked), (self.CAPACITY, 1))
@@ -6,9 +6,16 @@ from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.views.decorators.http import require_GET
 from django.contrib import messages
+from django.db import transaction
 from decimal import Decimal, InvalidOperation
 from .models import CustomerWasteInfo, CustomerPickupDate, CustomerLocationHistory
 from super_admin_dashboard.models import State, District, LocalBody, LocalBodyCalendar
+from super_admin_dashboard.exports import stream_json_array
+from super_admin_dashboard.replica import read_replica
+from super_admin_dashboard.geography import geography_version
+from super_admin_dashboard.views import geography_tree
+from super_admin_dashboard.availability import calendar_dates, parse_window
+from .booking import SlotFull, book_pickup, cancel_pickups, change_ward
 from .utils import is_customer
 
 
@@ -113,13 +120,11 @@ def waste_profile_create(request):
         if selected_date_id:
             try:
                 cal = LocalBodyCalendar.objects.get(pk=int(selected_date_id))
-                CustomerPickupDate.objects.create(
-                    user=request.user,
-                    waste_info=info,
-                    localbody_calendar=cal
-                )
-            except LocalBodyCalendar.DoesNotExist:
+                book_pickup(request.user, cal, waste_info=info)
+            except (LocalBodyCalendar.DoesNotExist, ValueError):
                 messages.error(request, "Selected pickup date is invalid.")
+            except SlotFull:
+                messages.error(request, "Selected pickup date is fully booked. Please choose another date.")
 
         return render(request, "waste_success.html", {"info": info})
 
@@ -131,6 +136,7 @@ def waste_profile_create(request):
         "districts": [],
         "localbodies": [],
         "info": None,
+        "geography_version": geography_version(),
     })
 
 
@@ -150,9 +156,19 @@ def waste_profile_update(request, pk):
     selected_dates = CustomerPickupDate.objects.filter(waste_info=info)
 
     if request.method == "POST":
-        # Store old coordinates for comparison
+        # Store old coordinates (and the ward pickups were reserved for) for comparison
         old_latitude = info.latitude
         old_longitude = info.longitude
+        old_ward = info.ward
+
+        # Resolve the requested pickup date before touching anything
+        cal = None
+        selected_date_id = request.POST.get("selected_date")
+        if selected_date_id:
+            try:
+                cal = LocalBodyCalendar.objects.get(pk=int(selected_date_id))
+            except (LocalBodyCalendar.DoesNotExist, ValueError):
+                messages.error(request, "Selected pickup date is invalid.")
 
         # Get and validate new coordinates
         latitude_raw = request.POST.get("latitude")
@@ -174,7 +190,18 @@ def waste_profile_update(request, pk):
         info.waste_type = request.POST.get("waste_type")
         info.comments = request.POST.get("comments")
         info.pincode = request.POST.get("pincode")
-        info.save()
+        try:
+            # The profile and its reserved places change together or not at all
+            with transaction.atomic():
+                info.save()
+                if cal is not None:
+                    # Move this profile's pickup (and its reserved place) to the new date and ward
+                    book_pickup(request.user, cal, waste_info=info, previous_ward=old_ward)
+                else:
+                    change_ward(info, old_ward)
+        except SlotFull:
+            messages.error(request, "Selected pickup date is fully booked for this ward. Please choose another date.")
+            return redirect("customer:waste_profile_detail", pk=info.id)
 
         # Track location change if coordinates changed
         if new_latitude and new_longitude:
@@ -191,22 +218,6 @@ def waste_profile_update(request, pk):
         else:
             messages.warning(request, "Waste profile updated without location data.")
 
-        # Handle pickup date update (replace old one with new if given)
-        selected_date_id = request.POST.get("selected_date")
-        if selected_date_id:
-            try:
-                cal = LocalBodyCalendar.objects.get(pk=int(selected_date_id))
-                # Remove old pickup dates for this profile
-                CustomerPickupDate.objects.filter(waste_info=info).delete()
-                # Create new pickup date
-                CustomerPickupDate.objects.create(
-                    user=request.user,
-                    waste_info=info,
-                    localbody_calendar=cal
-                )
-            except LocalBodyCalendar.DoesNotExist:
-                messages.error(request, "Selected pickup date is invalid.")
-
         return redirect("customer:waste_profile_detail", pk=info.id)
 
     return render(request, "waste_form.html", {
@@ -217,6 +228,7 @@ def waste_profile_update(request, pk):
         "districts": districts,
         "localbodies": localbodies,
         "info": info,
+        "geography_version": geography_version(),
     })
 
 
@@ -225,7 +237,10 @@ def waste_profile_update(request, pk):
 def waste_profile_delete(request, pk):
     info = get_object_or_404(CustomerWasteInfo, pk=pk, user=request.user)
     if request.method == "POST":
-        info.delete()
+        with transaction.atomic():
+            # Give the reserved places back before the pickups go with the profile
+            cancel_pickups(info)
+            info.delete()
         messages.success(request, "Waste profile deleted successfully!")
         return redirect("customer:waste_profile_list")
     return render(request, "waste_profile_delete.html", {"info": info})
@@ -235,34 +250,23 @@ def waste_profile_delete(request, pk):
 @user_passes_test(is_customer)
 @require_GET
 def get_available_dates(request, localbody_id):
-    """Get available pickup dates for a local body"""
-    all_dates = LocalBodyCalendar.objects.filter(localbody_id=localbody_id)
-    data = []
-    for d in all_dates:
-        data.append({
-            "id": d.id,
-            "date": d.date.isoformat(),
-            "title": "Available",
-        })
+    """Get available pickup dates for a local body within FullCalendar's ?start=&end= window"""
+    start, end = parse_window(request, past=False)
+    if start is None:
+        return JsonResponse({"error": "Invalid start/end"}, status=400)
+    data = [
+        {"id": pk, "date": d.isoformat(), "title": "Available"}
+        for pk, d in calendar_dates(localbody_id, start, end)
+    ]
     return JsonResponse(data, safe=False)
 
 
 @login_required
 @user_passes_test(is_customer)
 @require_GET
-def load_districts_customer(request, state_id):
-    """Load districts based on selected state"""
-    districts = District.objects.filter(state_id=state_id).values('id', 'name')
-    return JsonResponse(list(districts), safe=False)
-
-
-@login_required
-@user_passes_test(is_customer)
-@require_GET
-def load_localbodies_customer(request, district_id):
-    """Load local bodies based on selected district"""
-    localbodies = LocalBody.objects.filter(district_id=district_id).values('id', 'name', 'body_type')
-    return JsonResponse(list(localbodies), safe=False)
+def geography_customer(request):
+    """Districts and local bodies for the waste form: the shared, cached geography tree"""
+    return geography_tree(request)
 
 
 @login_required
@@ -273,12 +277,15 @@ def save_pickup_date(request):
         user = request.user
         date_id = request.POST.get("pickup_date")
         localbody_calendar = get_object_or_404(LocalBodyCalendar, pk=date_id)
+        waste_info = None
+        if request.POST.get("waste_info"):
+            waste_info = get_object_or_404(CustomerWasteInfo, pk=request.POST.get("waste_info"), user=user)
 
-        # Create or update
-        pickup_date, created = CustomerPickupDate.objects.update_or_create(
-            user=user,
-            defaults={"localbody_calendar": localbody_calendar}
-        )
+        # Create or update, reserving a place on the date
+        try:
+            pickup_date, created = book_pickup(user, localbody_calendar, waste_info=waste_info)
+        except SlotFull:
+            return JsonResponse({"status": "full", "message": "This pickup date is fully booked."}, status=409)
 
         if created:
             messages.success(request, "Pickup date saved successfully!")
@@ -356,15 +363,18 @@ def get_location_by_address(request):
 
 @login_required
 @user_passes_test(is_customer)
+@read_replica
 def export_locations(request):
     """
-    Export all customer locations as JSON for mapping/analytics
+    Export all customer locations as JSON for mapping/analytics (streamed row by row)
     """
     profiles = CustomerWasteInfo.objects.filter(
         user=request.user,
         latitude__isnull=False,
         longitude__isnull=False
-    ).values(
+    ).order_by('id')
+
+    return stream_json_array(profiles, [
         'id',
         'full_name',
         'pickup_address',
@@ -373,8 +383,6 @@ def export_locations(request):
         'waste_type',
         'status',
         'created_at'
-    )
-
-    return JsonResponse(list(profiles), safe=False)
+    ])
 
 
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+# Search index for the waste profile list (see super_admin_dashboard/search.py).
+# Only PostgreSQL and SQLite get a table; other backends keep the icontains search.
+# Fill it afterwards with: manage.py rebuild_profile_search
+
+SEARCH_TABLE = "waste_profile_search"
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        profile_id integer PRIMARY KEY,
+        document tsvector NOT NULL,
+        content text NOT NULL DEFAULT '',
+        phones text NOT NULL DEFAULT ''
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_doc_idx ON {SEARCH_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_trgm_idx ON {SEARCH_TABLE} USING GIN (content gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_phone_idx ON {SEARCH_TABLE} USING GIN (phones gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, phones, address, tokenize='unicode61', prefix='2 3 4'
+    )""",
+]
+
+
+def create_search_table(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    ddl = {"postgresql": POSTGRES_DDL, "sqlite": SQLITE_DDL}.get(vendor, [])
+    for statement in ddl:
+        schema_editor.execute(statement)
+
+
+def drop_search_table(apps, schema_editor):
+    # pg_trgm is left installed; other tables may use it
+    if schema_editor.connection.vendor in ("postgresql", "sqlite"):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("super_admin_dashboard", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+# One calendar row per local body and date. bulk_schedule relies on this constraint
+# to reject the pairs a concurrent request already inserted.
+# LocalBodyCalendar.Meta needs the same entry:
+#     constraints = [models.UniqueConstraint(fields=["localbody", "date"], name="localbody_calendar_unique_date")]
+
+
+def drop_duplicate_dates(apps, schema_editor):
+    # Keep the oldest row of each (localbody, date) pair
+    LocalBodyCalendar = apps.get_model("super_admin_dashboard", "LocalBodyCalendar")
+    duplicates = (
+        LocalBodyCalendar.objects.values("localbody_id", "date")
+        .annotate(keep=Min("id"), rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        LocalBodyCalendar.objects.filter(
+            localbody_id=dup["localbody_id"], date=dup["date"],
+        ).exclude(id=dup["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("super_admin_dashboard", "0002_profile_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_dates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="localbodycalendar",
+            constraint=models.UniqueConstraint(
+                fields=("localbody", "date"), name="localbody_calendar_unique_date",
+            ),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class SuperAdminDashboardConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "super_admin_dashboard"
+
+    def ready(self):
+        # Cache invalidation and search indexing receivers
+        from . import availability, geography, search
+
+        availability.connect_signals()
+        geography.connect_signals()
+        search.connect_signals()
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import CustomUser
+from super_admin_dashboard.assignment import assignment_queryset, bulk_assign
+
+
+class Command(BaseCommand):
+    help = "Bulk-assign waste profiles to a collector (by local body, ward, ids or current collector)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('collector', type=int, help="Id of the collector (role=1) to assign.")
+        parser.add_argument('--localbody', type=int)
+        parser.add_argument('--ward')
+        parser.add_argument('--ids', type=int, nargs='+')
+        parser.add_argument('--from-collector', type=int, help="Only profiles currently on this collector.")
+        parser.add_argument('--unassigned-only', action='store_true', help="Only the selected profiles with no collector.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        try:
+            collector = CustomUser.objects.get(pk=options['collector'], role=1)
+        except CustomUser.DoesNotExist:
+            raise CommandError("No collector with that id")
+        # --unassigned-only narrows a selection; on its own it would match every profile
+        if not any(options[k] for k in ('localbody', 'ward', 'ids', 'from_collector')):
+            raise CommandError("Select profiles with --localbody, --ward, --ids or --from-collector")
+
+        profiles = assignment_queryset(
+            localbody=options['localbody'], ward=options['ward'], ids=options['ids'],
+            from_collector=options['from_collector'], unassigned_only=options['unassigned_only'],
+        )
+        summary = bulk_assign(collector, profiles, dry_run=options['dry_run'])
+
+        verb = "Would assign" if options['dry_run'] else "Assigned"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['changed']} of {summary['matched']} profiles to {collector.username}."
+        ))
+        for previous, count in summary['previous'].items():
+            self.stdout.write(f"  from {previous}: {count}")
+        if summary['batch']:
+            self.stdout.write(f"  batch {summary['batch']}")
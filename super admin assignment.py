@@ -0,0 +1,61 @@
+import uuid
+from collections import Counter
+
+from django.db import transaction
+
+from customer_dashboard.models import CustomerWasteInfo
+from waste_collector_dashboard.models import CollectorAssignmentChange
+from waste_collector_dashboard.stats import invalidate_collector_stats
+
+
+def assignment_queryset(localbody=None, ward=None, ids=None, from_collector=None, unassigned_only=False):
+    """Profiles selected by local body / ward / explicit ids / current collector."""
+    profiles = CustomerWasteInfo.objects.all()
+    if localbody:
+        profiles = profiles.filter(localbody_id=localbody)
+    if ward:
+        profiles = profiles.filter(ward=ward)
+    if ids:
+        profiles = profiles.filter(id__in=ids)
+    if from_collector:
+        profiles = profiles.filter(assigned_collector_id=from_collector)
+    if unassigned_only:
+        profiles = profiles.filter(assigned_collector__isnull=True)
+    return profiles
+
+
+def bulk_assign(collector, profiles, changed_by=None, dry_run=False):
+    """
+    Assign every profile in the queryset to collector with one UPDATE, logging each
+    change in one bulk INSERT. Profiles already on that collector are untouched.
+    Returns {"batch", "matched", "changed", "previous": {collector_id: count}}.
+    A dry run only reads, without locking the profiles.
+    """
+    with transaction.atomic():
+        pending = profiles.exclude(assigned_collector=collector)
+        locked = pending if dry_run else pending.select_for_update()
+        rows = list(locked.values_list('id', 'assigned_collector_id'))
+        previous = Counter(prev for _, prev in rows)
+        summary = {
+            'batch': None,
+            'matched': profiles.count(),
+            'changed': len(rows),
+            'previous': {str(k) if k is not None else 'unassigned': v for k, v in previous.items()},
+        }
+        if dry_run or not rows:
+            return summary
+
+        batch = uuid.uuid4()
+        summary['changed'] = pending.update(assigned_collector=collector)
+        CollectorAssignmentChange.objects.bulk_create([
+            CollectorAssignmentChange(
+                batch=batch, waste_info_id=pk, previous_collector_id=prev,
+                new_collector=collector, changed_by=changed_by,
+            )
+            for pk, prev in rows
+        ], batch_size=1000)
+        summary['batch'] = str(batch)
+        # Pending pickup counts move from the previous collectors to the new one
+        collector_ids = {collector.id} | {prev for prev in previous if prev is not None}
+        transaction.on_commit(lambda: invalidate_collector_stats(*collector_ids))
+        return summary
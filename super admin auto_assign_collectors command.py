@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from super_admin_dashboard.auto_assignment import CLUSTERS_PER_COLLECTOR, auto_assign
+
+
+class Command(BaseCommand):
+    help = "Plan load-balanced collector assignments for unassigned waste profiles (dry run unless --apply)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('localbody', type=int, nargs='+', help="Local body ids to plan.")
+        parser.add_argument('--collectors', type=int, nargs='+',
+                            help="Collector ids to use instead of the ones already serving each local body.")
+        parser.add_argument('--clusters-per-collector', type=int, default=CLUSTERS_PER_COLLECTOR)
+        parser.add_argument('--apply', action='store_true', help="Write the plan (default: dry run).")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = auto_assign(
+            options['localbody'],
+            collector_ids=options['collectors'],
+            dry_run=not options['apply'],
+            clusters_per_collector=options['clusters_per_collector'],
+        )
+        for localbody_id, entry in report.items():
+            if not entry['collectors']:
+                self.stdout.write(f"Local body {localbody_id}: nothing to assign (no collectors or no located unassigned profiles).")
+                continue
+            self.stdout.write(f"Local body {localbody_id}: {entry['planned']} profiles planned")
+            for collector_id, load in entry['collectors'].items():
+                self.stdout.write(f"  collector {collector_id}: {load['stops']} stops, ~{load['kg']:.1f} kg")
+            if entry['batch']:
+                self.stdout.write(f"  applied {entry['changed']} (batch {entry['batch']})")
+
+        mode = "Applied" if options['apply'] else "Dry run"
+        self.stdout.write(self.style.SUCCESS(f"{mode} finished in {time.perf_counter() - started:.2f}s."))
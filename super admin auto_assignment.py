@@ -0,0 +1,227 @@
+import math
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, Q, Subquery
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from customer_dashboard.models import CustomerWasteInfo
+from waste_collector_dashboard.models import CollectorAssignmentChange, WasteCollection
+from waste_collector_dashboard.stats import invalidate_collector_stats
+
+
+CLUSTERS_PER_COLLECTOR = 8
+KMEANS_ITERATIONS = 12
+UPDATE_BATCH_SIZE = 500
+# Collection history that counts towards a customer's expected kg
+EXPECTED_KG_DAYS = 90
+
+
+def kmeans(points, k, iterations=KMEANS_ITERATIONS, seed=0):
+    """Plain vectorized k-means; returns (labels, centroids)."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(points))
+    origin = points.mean(axis=0)
+    # Centred float32 keeps the matrix products cheap without losing precision at city scale
+    points = (points - origin).astype(np.float32)
+    centroids = points[rng.choice(len(points), size=k, replace=False)].copy()
+    labels = np.zeros(len(points), dtype=np.int64)
+    for iteration in range(iterations):
+        # |p|^2 is the same for every centroid, so it is left out of the argmin
+        dist = (centroids ** 2).sum(axis=1)[None, :] - 2 * points @ centroids.T
+        new_labels = dist.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.column_stack([
+            np.bincount(labels, weights=points[:, d], minlength=k) for d in range(points.shape[1])
+        ])
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return labels, centroids + origin
+
+
+def _project(latitudes, longitudes, scale=None):
+    """
+    Equirectangular projection so euclidean distance tracks ground distance.
+    Pass the scale of an earlier projection to get points comparable with it.
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lng = np.asarray(longitudes, dtype=float)
+    if scale is None:
+        scale = math.cos(math.radians(float(lat.mean()))) if len(lat) else 1.0
+    return np.column_stack([lat, lng * scale]), scale
+
+
+def _expected_kg(localbody_ids, days=EXPECTED_KG_DAYS):
+    """
+    Average kg per customer over the last days of collections in the given local
+    bodies, plus the overall average there; recent habits, not all history.
+    """
+    recent = WasteCollection.objects.filter(
+        localbody_id__in=localbody_ids,
+        created_at__date__gte=timezone.localdate() - timedelta(days=days),
+    )
+    per_customer = dict(
+        recent.values('customer_id').annotate(avg=Avg('kg')).values_list('customer_id', 'avg')
+    )
+    overall = recent.aggregate(avg=Avg('kg'))['avg'] or 0
+    return {k: float(v) for k, v in per_customer.items()}, float(overall)
+
+
+def localbody_collectors(localbody_id):
+    """Collectors (role=1) already serving a local body, by assignment or collection history."""
+    assigned = CustomerWasteInfo.objects.filter(localbody_id=localbody_id).values('assigned_collector_id')
+    collected = WasteCollection.objects.filter(localbody_id=localbody_id).values('collector_id')
+    # One query: the database de-duplicates the ids instead of Python pulling one per row
+    return list(CustomUser.objects.filter(
+        Q(id__in=Subquery(assigned)) | Q(id__in=Subquery(collected)), role=1,
+    ).order_by('id'))
+
+
+def plan_localbody(localbody_id, collectors, kg_by_customer, default_kg,
+                   clusters_per_collector=CLUSTERS_PER_COLLECTOR):
+    """
+    Plan assignments for the unassigned, located profiles of one local body.
+    Profiles are over-clustered with k-means, clusters are swept by angle around the
+    local body's centre and cut into contiguous runs so each collector ends up with
+    about the same share of stops and expected kg (existing assignments included).
+    Returns ({profile_id: collector_id}, {collector_id: {"stops", "kg"}}).
+    """
+    if not collectors:
+        return {}, {}
+    collector_ids = [c.id for c in collectors]
+
+    profiles = list(CustomerWasteInfo.objects.filter(
+        localbody_id=localbody_id, assigned_collector__isnull=True,
+        latitude__isnull=False, longitude__isnull=False,
+    ).values_list('id', 'user_id', 'latitude', 'longitude'))
+    if not profiles:
+        return {}, {}
+
+    existing = list(CustomerWasteInfo.objects.filter(
+        localbody_id=localbody_id, assigned_collector_id__in=collector_ids,
+    ).values_list('assigned_collector_id', 'user_id', 'latitude', 'longitude'))
+
+    ids = np.array([p[0] for p in profiles])
+    points, scale = _project([p[2] for p in profiles], [p[3] for p in profiles])
+    kg = np.array([kg_by_customer.get(p[1], default_kg) for p in profiles])
+
+    # Load combines stop count and expected kg with equal weight
+    n_total = len(profiles) + len(existing)
+    kg_total = kg.sum() + sum(kg_by_customer.get(e[1], default_kg) for e in existing)
+
+    def load(stops, kilos):
+        return 0.5 * stops / n_total + (0.5 * kilos / kg_total if kg_total else 0.5 * stops / n_total)
+
+    existing_load = {cid: 0.0 for cid in collector_ids}
+    existing_pos = {cid: [] for cid in collector_ids}
+    for cid, user_id, lat, lng in existing:
+        existing_load[cid] += load(1, kg_by_customer.get(user_id, default_kg))
+        if lat is not None and lng is not None:
+            existing_pos[cid].append((float(lat), float(lng)))
+
+    labels, centroids = kmeans(points, len(collector_ids) * clusters_per_collector)
+    cluster_stops = np.bincount(labels, minlength=len(centroids))
+    cluster_kg = np.bincount(labels, weights=kg, minlength=len(centroids))
+    cluster_load = load(cluster_stops, cluster_kg)
+
+    centre = points.mean(axis=0)
+
+    def angle(p):
+        return math.atan2(p[0] - centre[0], p[1] - centre[1])
+
+    cluster_order = sorted(range(len(centroids)), key=lambda c: angle(centroids[c]))
+
+    # Collectors with a territory are swept in the same angular order
+    def collector_angle(cid):
+        if not existing_pos[cid]:
+            return math.inf
+        lats, lngs = zip(*existing_pos[cid])
+        # Same scale as the profiles, or the angles would not be comparable
+        return angle(_project(lats, lngs, scale)[0].mean(axis=0))
+
+    collector_order = sorted(collector_ids, key=collector_angle)
+    fair_share = (sum(existing_load.values()) + cluster_load.sum()) / len(collector_ids)
+    targets = [max(fair_share - existing_load[cid], 0.0) for cid in collector_order]
+    target_total = sum(targets) or 1.0
+    boundaries = np.cumsum(targets) / target_total * cluster_load.sum()
+
+    cluster_owner = {}
+    running = 0.0
+    position = 0
+    for c in cluster_order:
+        midpoint = running + cluster_load[c] / 2
+        while position < len(collector_order) - 1 and midpoint > boundaries[position]:
+            position += 1
+        cluster_owner[c] = collector_order[position]
+        running += cluster_load[c]
+
+    plan = {int(pid): cluster_owner[int(label)] for pid, label in zip(ids, labels)}
+    summary = {cid: {'stops': 0, 'kg': 0.0} for cid in collector_ids}
+    for pid_index, label in enumerate(labels):
+        owner = cluster_owner[int(label)]
+        summary[owner]['stops'] += 1
+        summary[owner]['kg'] += float(kg[pid_index])
+    return plan, summary
+
+
+def apply_plan(plan, changed_by=None):
+    """Write a plan with one UPDATE per collector and batch; logs every change."""
+    by_collector = {}
+    for pid, cid in plan.items():
+        by_collector.setdefault(cid, []).append(pid)
+
+    batch = uuid.uuid4()
+    changed = 0
+    # Profiles were unassigned, so only the receiving collectors' figures change
+    touched = set()
+    with transaction.atomic():
+        for cid, pids in by_collector.items():
+            for i in range(0, len(pids), UPDATE_BATCH_SIZE):
+                # Skip anything assigned by hand since the plan was made
+                still_free = list(CustomerWasteInfo.objects.select_for_update().filter(
+                    id__in=pids[i:i + UPDATE_BATCH_SIZE], assigned_collector__isnull=True
+                ).values_list('id', flat=True))
+                if not still_free:
+                    continue
+                changed += CustomerWasteInfo.objects.filter(id__in=still_free).update(assigned_collector_id=cid)
+                touched.add(cid)
+                CollectorAssignmentChange.objects.bulk_create([
+                    CollectorAssignmentChange(
+                        batch=batch, waste_info_id=pid, previous_collector_id=None,
+                        new_collector_id=cid, changed_by=changed_by,
+                    )
+                    for pid in still_free
+                ])
+        transaction.on_commit(lambda: invalidate_collector_stats(*touched))
+    return str(batch), changed
+
+
+def auto_assign(localbody_ids, collector_ids=None, dry_run=True, changed_by=None,
+                clusters_per_collector=CLUSTERS_PER_COLLECTOR):
+    """
+    Plan (and unless dry_run, apply) auto-assignment for the given local bodies.
+    collector_ids overrides the collectors inferred for each local body.
+    Returns {localbody_id: {"collectors": {id: {"stops", "kg"}}, "planned", "changed", "batch"}}.
+    """
+    kg_by_customer, default_kg = _expected_kg(localbody_ids)
+    chosen = None
+    if collector_ids:
+        chosen = list(CustomUser.objects.filter(role=1, id__in=collector_ids).order_by('id'))
+
+    report = {}
+    for localbody_id in localbody_ids:
+        collectors = chosen if chosen is not None else localbody_collectors(localbody_id)
+        plan, summary = plan_localbody(
+            localbody_id, collectors, kg_by_customer, default_kg, clusters_per_collector
+        )
+        entry = {'collectors': summary, 'planned': len(plan), 'changed': 0, 'batch': None}
+        if plan and not dry_run:
+            entry['batch'], entry['changed'] = apply_plan(plan, changed_by=changed_by)
+        report[localbody_id] = entry
+    return report
@@ -0,0 +1,93 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import LocalBodyCalendar
+
+
+CALENDAR_CACHE_TIMEOUT = getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 3600)
+MAX_WINDOW_DAYS = 400
+DEFAULT_WINDOW_DAYS = 92
+
+
+def parse_window(request, past=True):
+    """
+    (start, end) dates from FullCalendar's ?start=&end= (ISO date or datetime; end exclusive).
+    Without them: the next DEFAULT_WINDOW_DAYS. past=False clamps start to today.
+    Returns (None, None) for an invalid window.
+    """
+    today = timezone.localdate()
+    raw_start = request.GET.get('start', '')[:10]
+    raw_end = request.GET.get('end', '')[:10]
+    try:
+        start = parse_date(raw_start) if raw_start else today
+        end = parse_date(raw_end) if raw_end else today + timedelta(days=DEFAULT_WINDOW_DAYS)
+    except ValueError:
+        # Well formed but impossible, e.g. 2026-02-30
+        return None, None
+    if start is None or end is None:
+        return None, None
+    if not past:
+        start = max(start, today)
+    if (end - start).days > MAX_WINDOW_DAYS:
+        return None, None
+    return start, end
+
+
+def _version_key(localbody_id):
+    return f'calendar:v:{localbody_id}'
+
+
+def _fresh_version():
+    # Never reuse a number: after the version key is evicted, windows cached
+    # under an earlier version may still be in the cache
+    return time.time_ns()
+
+
+def _version(localbody_id):
+    version = cache.get(_version_key(localbody_id))
+    if version is None:
+        version = _fresh_version()
+        if not cache.add(_version_key(localbody_id), version, None):
+            # Another request seeded it first
+            version = cache.get(_version_key(localbody_id), version)
+    return version
+
+
+def calendar_dates(localbody_id, start, end):
+    """[(id, date)] for one local body with start <= date < end, cached per window."""
+    key = f'calendar:{localbody_id}:{_version(localbody_id)}:{start.isoformat()}:{end.isoformat()}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            LocalBodyCalendar.objects.filter(
+                localbody_id=localbody_id, date__gte=start, date__lt=end,
+            ).order_by('date').values_list('id', 'date')
+        )
+        cache.set(key, rows, CALENDAR_CACHE_TIMEOUT)
+    return rows
+
+
+def invalidate_calendar(localbody_ids):
+    """Bump the cache version of each local body so all of its windows are re-read."""
+    for localbody_id in set(localbody_ids):
+        try:
+            cache.incr(_version_key(localbody_id))
+        except ValueError:
+            cache.set(_version_key(localbody_id), _fresh_version(), None)
+
+
+def _calendar_changed(sender, instance, **kwargs):
+    localbody_id = instance.localbody_id
+    transaction.on_commit(lambda: invalidate_calendar([localbody_id]))
+
+
+def connect_signals():
+    post_save.connect(_calendar_changed, sender=LocalBodyCalendar, dispatch_uid='calendar_cache_save')
+    post_delete.connect(_calendar_changed, sender=LocalBodyCalendar, dispatch_uid='calendar_cache_delete')
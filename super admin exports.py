@@ -0,0 +1,58 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[f] for f in fields])
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_export(queryset, fields, fmt, filename):
+    """
+    Stream queryset.values(*fields) as CSV or NDJSON. Rows are read with a server-side
+    cursor (iterator), so memory stays flat however many rows are exported.
+    """
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if fmt == "csv":
+        lines = _csv_lines(rows, fields)
+    else:
+        fmt = "ndjson"
+        lines = _ndjson_lines(rows)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def stream_json_array(queryset, fields):
+    """Stream queryset.values(*fields) as one JSON array, row by row."""
+    def chunks():
+        yield "["
+        for i, row in enumerate(queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+            yield ("," if i else "") + json.dumps(row, cls=DjangoJSONEncoder)
+        yield "]"
+    return StreamingHttpResponse(chunks(), content_type="application/json")
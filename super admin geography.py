@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from .models import State, District, LocalBody
+
+
+# Upper bound on how stale another worker process's copy can get
+GEOGRAPHY_CACHE_TTL = getattr(settings, 'GEOGRAPHY_CACHE_TTL', 600)
+
+_lock = threading.Lock()
+_cache = None        # {"version", "loaded_at", "tree", "districts", "localbodies", "state_ids", "district_ids", "payloads"}
+
+
+def _load():
+    """The whole State -> District -> LocalBody tree in three queries."""
+    localbodies = {}
+    for lb in LocalBody.objects.order_by('name').values('id', 'name', 'body_type', 'district_id'):
+        localbodies.setdefault(lb.pop('district_id'), []).append(lb)
+
+    districts = {}
+    for d in District.objects.order_by('name').values('id', 'name', 'state_id'):
+        state_id = d.pop('state_id')
+        districts.setdefault(state_id, []).append(d)
+
+    tree = []
+    for s in State.objects.order_by('name').values('id', 'name'):
+        s['districts'] = [
+            dict(d, localbodies=localbodies.get(d['id'], [])) for d in districts.get(s['id'], [])
+        ]
+        tree.append(s)
+
+    body = json.dumps(tree, sort_keys=True, separators=(',', ':')).encode()
+    return {
+        'version': hashlib.sha1(body).hexdigest()[:12],
+        'loaded_at': time.monotonic(),
+        'tree': tree,
+        'districts': districts,
+        'localbodies': localbodies,
+        'state_ids': {s['id'] for s in tree},
+        'district_ids': {d['id'] for ds in districts.values() for d in ds},
+        'payloads': {},
+    }
+
+
+def _get():
+    global _cache
+    with _lock:
+        if _cache is None or time.monotonic() - _cache['loaded_at'] > GEOGRAPHY_CACHE_TTL:
+            _cache = _load()
+        return _cache
+
+
+def geography_version():
+    """Content version of the tree; embed it in URLs (?v=) so browsers can cache forever."""
+    return _get()['version']
+
+
+def districts_for_state(state_id):
+    """[{id, name}] of a state's districts, or None for an unknown state."""
+    cache = _get()
+    if int(state_id) not in cache['state_ids']:
+        return None
+    return [{'id': d['id'], 'name': d['name']} for d in cache['districts'].get(int(state_id), [])]
+
+
+def localbodies_for_district(district_id):
+    """A district's local bodies, or None for an unknown district."""
+    cache = _get()
+    if int(district_id) not in cache['district_ids']:
+        return None
+    return list(cache['localbodies'].get(int(district_id), []))
+
+
+def tree_payload(state_id=None, district_id=None):
+    """
+    (json bytes, strong etag) for the whole tree, one state, or one district;
+    (None, None) for an unknown state or district. Serialized once per version and scope.
+    """
+    cache = _get()
+    key = (state_id, district_id)
+    with _lock:
+        cached = cache['payloads'].get(key)
+    if cached:
+        return cached
+
+    if district_id is not None:
+        data = localbodies_for_district(district_id)
+        if data is None:
+            return None, None
+    elif state_id is not None:
+        data = next((s for s in cache['tree'] if s['id'] == int(state_id)), None)
+        if data is None:
+            return None, None
+    else:
+        data = cache['tree']
+    body = json.dumps({'version': cache['version'], 'data': data}, separators=(',', ':')).encode()
+    result = (body, hashlib.sha1(body).hexdigest())
+    with _lock:
+        cache['payloads'][key] = result
+    return result
+
+
+def invalidate_geography(**kwargs):
+    global _cache
+    with _lock:
+        _cache = None
+
+
+def connect_signals():
+    for model in (State, District, LocalBody):
+        post_save.connect(invalidate_geography, sender=model, dispatch_uid=f'geography_save_{model.__name__}')
+        post_delete.connect(invalidate_geography, sender=model, dispatch_uid=f'geography_delete_{model.__name__}')
@@ -0,0 +1,96 @@
+import base64
+import json
+
+from django.db import connections
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+    """One page of a keyset-paginated listing."""
+
+    def __init__(self, object_list, next_cursor, approx_count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.approx_count = approx_count
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _after(fields, values):
+    """Rows strictly after values in descending (fields) order."""
+    condition = Q()
+    for i, field in enumerate(fields):
+        step = Q(**{f"{field}__lt": values[i]})
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev_field: prev_value})
+        condition |= step
+    return condition
+
+
+def approximate_count(queryset):
+    """
+    Planner row estimate for an unfiltered PostgreSQL table; None elsewhere,
+    so listings never pay for a COUNT(*) on every request. Asks the database
+    the queryset itself reads from (the replica inside @read_replica views).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return max(row[0], 0) if row else None
+
+
+def keyset_page(queryset, fields, cursor=None, per_page=25, with_count=False):
+    """
+    Newest-first page of queryset ordered by fields (e.g. ("created_at", "id")),
+    continuing after an opaque cursor. The last field must be unique.
+    Raises InvalidCursor for a tampered cursor.
+    """
+    fields = tuple(fields)
+    approx = approximate_count(queryset) if with_count else None
+    if cursor:
+        queryset = queryset.filter(_after(fields, decode_cursor(cursor, len(fields))))
+
+    rows = list(queryset.order_by(*[f"-{f}" for f in fields])[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, f) for f in fields])
+    return KeysetPage(rows, next_cursor, approx)
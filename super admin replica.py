@@ -0,0 +1,85 @@
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+
+# Enable with DATABASES["replica"] (locally a second SQLite file with "TEST": {"MIRROR": "default"}),
+# DATABASE_ROUTERS = ["super_admin_dashboard.replica.ReplicaRouter"] and
+# ReplicaStickinessMiddleware in MIDDLEWARE. Without the alias everything reads from the primary.
+REPLICA_ALIAS = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+REPLICA_STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 15)
+STICKY_COOKIE = "db_primary_pin"
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_alias():
+    return REPLICA_ALIAS if REPLICA_ALIAS in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    """Reads go to the replica only inside @read_replica views; writes always go to default."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+def _pinned(request):
+    return bool(request.COOKIES.get(STICKY_COOKIE))
+
+
+def _replica_stream(content):
+    """Keep a streaming response's reads on the replica while it is being consumed."""
+    token = _use_replica.set(True)
+    try:
+        yield from content
+    finally:
+        _use_replica.reset(token)
+
+
+def read_replica(view):
+    """Serve a read-only view from the replica, unless this user has written just now."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or _pinned(request) or replica_alias() is None:
+            return view(request, *args, **kwargs)
+        token = _use_replica.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+        if response.streaming:
+            # Exports run their queries while streaming, after the view has returned
+            response.streaming_content = _replica_stream(response.streaming_content)
+        return response
+
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """Pin a client to the primary for a few seconds after any write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            response.set_cookie(
+                STICKY_COOKIE, "1", max_age=REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
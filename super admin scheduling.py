@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+
+from .availability import invalidate_calendar
+from .models import LocalBody, LocalBodyCalendar
+
+
+# Longest range a single scheduling request may cover (two years)
+MAX_SCHEDULE_DAYS = 731
+
+# Times bulk_schedule re-reads the existing pairs after losing a race
+MAX_INSERT_ATTEMPTS = 3
+
+
+def expand_recurrence(start, end, weekdays=None, skip_dates=()):
+    """
+    Return the dates from start to end (inclusive) that match the recurrence rule.
+    weekdays uses Python numbering (Monday=0 ... Sunday=6); empty means every day.
+    skip_dates are left out (holidays etc).
+    """
+    allowed = set(weekdays) if weekdays else None
+    skip = set(skip_dates)
+    dates = []
+    cur = start
+    while cur <= end:
+        if (allowed is None or cur.weekday() in allowed) and cur not in skip:
+            dates.append(cur)
+        cur += timedelta(days=1)
+    return dates
+
+
+def bulk_schedule(localbody_ids, dates):
+    """
+    Create LocalBodyCalendar rows for every local body / date pair that does not exist yet.
+    Uses one SELECT for the local bodies, one for the existing pairs and one bulk INSERT,
+    however long the range is. Returns only the entries this call inserted, with ids.
+    """
+    if not localbody_ids or not dates:
+        return []
+
+    valid_ids = list(
+        LocalBody.objects.filter(pk__in=localbody_ids).values_list("id", flat=True)
+    )
+
+    with transaction.atomic():
+        for attempt in range(MAX_INSERT_ATTEMPTS):
+            existing = set(
+                LocalBodyCalendar.objects.filter(
+                    localbody_id__in=valid_ids,
+                    date__range=(min(dates), max(dates)),
+                ).values_list("localbody_id", "date")
+            )
+            new_entries = [
+                LocalBodyCalendar(localbody_id=lb_id, date=d)
+                for lb_id in valid_ids
+                for d in dates
+                if (lb_id, d) not in existing
+            ]
+            try:
+                with transaction.atomic():
+                    created = LocalBodyCalendar.objects.bulk_create(new_entries)
+                break
+            except IntegrityError:
+                # A concurrent request inserted some of the same pairs after the SELECT;
+                # the unique (localbody, date) constraint rejected the batch, so look again
+                if attempt == MAX_INSERT_ATTEMPTS - 1:
+                    raise
+        # bulk_create sends no post_save, so drop the cached windows here
+        transaction.on_commit(lambda: invalidate_calendar(valid_ids))
+
+    return sorted(created, key=lambda entry: (entry.localbody_id, entry.date))
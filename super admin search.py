@@ -0,0 +1,196 @@
+import re
+
+from django.db import connection, connections, router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from authentication.models import CustomUser
+from customer_dashboard.models import CustomerWasteInfo
+
+
+# Search index over waste profiles (name, phone numbers, address).
+# PostgreSQL: tsvector + pg_trgm table; SQLite: FTS5 virtual table;
+# other backends fall back to the old icontains filter.
+# The table and its indexes are created by the profile_search migration.
+
+SEARCH_TABLE = "waste_profile_search"
+MAX_RESULTS = 500
+# CustomUser fields that end up in a profile's index row (see _document)
+USER_INDEXED_FIELDS = frozenset({"first_name", "last_name", "contact_number"})
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_PHONE_QUERY_RE = re.compile(r"^[\d\s+()-]+$")
+
+def normalize_phone(value):
+    """Digits only, without a leading +91 / 0 so numbers compare as 10-digit locals."""
+    digits = re.sub(r"\D", "", value or "")
+    if len(digits) > 10 and digits.startswith("91"):
+        digits = digits[2:]
+    if len(digits) > 10 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits
+
+
+def _vendor(conn=connection):
+    return conn.vendor if conn.vendor in ("postgresql", "sqlite") else None
+
+
+def _document(profile):
+    user = profile.user
+    name = " ".join(filter(None, [
+        profile.full_name, user.first_name if user else "", user.last_name if user else "",
+    ]))
+    phones = " ".join(filter(None, [
+        normalize_phone(user.contact_number if user else ""),
+        normalize_phone(profile.secondary_number),
+    ]))
+    return name, phones, profile.pickup_address or ""
+
+
+def index_profiles(profiles):
+    """Insert or refresh the index rows for the given profiles (user must be loaded)."""
+    vendor = _vendor()
+    if vendor is None:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        for profile in profiles:
+            name, phones, address = _document(profile)
+            if vendor == "postgresql":
+                cursor.execute(
+                    f"""INSERT INTO {SEARCH_TABLE} (profile_id, document, content, phones)
+                        VALUES (%s,
+                                setweight(to_tsvector('simple', %s), 'A') ||
+                                setweight(to_tsvector('simple', %s), 'B'),
+                                %s, %s)
+                        ON CONFLICT (profile_id) DO UPDATE SET
+                            document = EXCLUDED.document,
+                            content = EXCLUDED.content,
+                            phones = EXCLUDED.phones""",
+                    [profile.pk, name, address, f"{name} {address}", phones],
+                )
+            else:
+                cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [profile.pk])
+                cursor.execute(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, name, phones, address) VALUES (%s, %s, %s, %s)",
+                    [profile.pk, name, phones, address],
+                )
+
+
+def remove_profiles(profile_ids):
+    if _vendor() is None or not profile_ids:
+        return
+    column = "profile_id" if _vendor() == "postgresql" else "rowid"
+    placeholders = ", ".join(["%s"] * len(profile_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} IN ({placeholders})", list(profile_ids))
+
+
+def rebuild_index(batch_size=1000):
+    """Re-index every waste profile. Returns the number of profiles indexed."""
+    if _vendor() is None:
+        return 0
+    count = 0
+    batch = []
+    # Searches keep seeing the old index until the new one is complete
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for profile in CustomerWasteInfo.objects.select_related("user").iterator(chunk_size=batch_size):
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                index_profiles(batch)
+                count += len(batch)
+                batch = []
+        index_profiles(batch)
+    return count + len(batch)
+
+
+def _phone_query(query):
+    """Return normalized digits when the query looks like a phone number."""
+    if _PHONE_QUERY_RE.match(query):
+        digits = normalize_phone(query)
+        if len(digits) >= 3:
+            return digits
+    return None
+
+
+def search_profile_ids(query, limit=MAX_RESULTS):
+    """
+    Ranked profile ids for a free-text query. Every word is prefix-matched;
+    phone-like queries are normalized and prefix-matched against both numbers.
+    """
+    query = (query or "").strip()
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return []
+    phone = _phone_query(query)
+    # Same database the profile queryset reads from (the replica inside @read_replica views)
+    read_connection = connections[router.db_for_read(CustomerWasteInfo)]
+    vendor = _vendor(read_connection)
+
+    if vendor is None:
+        return list(
+            CustomerWasteInfo.objects.filter(
+                Q(user__first_name__icontains=query) |
+                Q(user__last_name__icontains=query) |
+                Q(user__contact_number__icontains=query) |
+                Q(pickup_address__icontains=query)
+            ).order_by("-id").values_list("id", flat=True)[:limit]
+        )
+
+    with read_connection.cursor() as cursor:
+        if vendor == "sqlite":
+            if phone:
+                match = f'phones : "{phone}"*'
+            else:
+                match = " ".join(f'"{token}"*' for token in tokens)
+            cursor.execute(
+                f"""SELECT rowid FROM {SEARCH_TABLE}
+                    WHERE {SEARCH_TABLE} MATCH %s
+                    ORDER BY bm25({SEARCH_TABLE}, 10.0, 5.0, 1.0)
+                    LIMIT %s""",
+                [match, limit],
+            )
+        elif phone:
+            cursor.execute(
+                f"""SELECT profile_id FROM {SEARCH_TABLE}
+                    WHERE phones LIKE %s OR phones LIKE %s
+                    ORDER BY similarity(phones, %s) DESC
+                    LIMIT %s""",
+                [f"{phone}%", f"% {phone}%", phone, limit],
+            )
+        else:
+            tsquery = " & ".join(f"{token}:*" for token in tokens)
+            cursor.execute(
+                f"""SELECT profile_id FROM {SEARCH_TABLE}
+                    WHERE document @@ to_tsquery('simple', %s) OR content %% %s
+                    ORDER BY ts_rank(document, to_tsquery('simple', %s)) + similarity(content, %s) DESC
+                    LIMIT %s""",
+                [tsquery, query, tsquery, query, limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+# Keep the index in step with profile and user edits (connected in apps.py)
+
+def _profile_saved(sender, instance, **kwargs):
+    index_profiles([instance])
+
+
+def _profile_deleted(sender, instance, **kwargs):
+    remove_profiles([instance.pk])
+
+
+def _user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A new user has no profile yet; saves such as update_last_login touch nothing indexed
+    if created or instance.role != 0:
+        return
+    if update_fields is not None and not USER_INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_profiles(CustomerWasteInfo.objects.filter(user=instance).select_related("user"))
+
+
+def connect_signals():
+    post_save.connect(_profile_saved, sender=CustomerWasteInfo, dispatch_uid="waste_profile_search_save")
+    post_delete.connect(_profile_deleted, sender=CustomerWasteInfo, dispatch_uid="waste_profile_search_delete")
+    post_save.connect(_user_saved, sender=CustomUser, dispatch_uid="waste_profile_search_user_save")
@@ -0,0 +1,77 @@
+import json
+from datetime import date
+
+from django.test import RequestFactory, TestCase
+
+from .availability import parse_window
+from .geography import invalidate_geography, tree_payload
+from .models import District, LocalBody, LocalBodyCalendar, State
+from .scheduling import bulk_schedule, expand_recurrence
+
+
+class SchedulingTests(TestCase):
+
+    def setUp(self):
+        state = State.objects.create(name="Kerala")
+        district = District.objects.create(state=state, name="Thrissur")
+        self.localbody = LocalBody.objects.create(district=district, name="Thrissur Corporation")
+
+    def test_expand_recurrence_keeps_weekdays_and_drops_skipped_dates(self):
+        # 2030-01-07 is a Monday
+        dates = expand_recurrence(date(2030, 1, 7), date(2030, 1, 20), weekdays=[0, 3], skip_dates=[date(2030, 1, 10)])
+
+        self.assertEqual(dates, [date(2030, 1, 7), date(2030, 1, 14), date(2030, 1, 17)])
+
+    def test_bulk_schedule_only_returns_the_dates_it_added(self):
+        LocalBodyCalendar.objects.create(localbody=self.localbody, date=date(2030, 1, 8))
+
+        created = bulk_schedule([self.localbody.id], [date(2030, 1, 7), date(2030, 1, 8), date(2030, 1, 9)])
+
+        self.assertEqual([entry.date for entry in created], [date(2030, 1, 7), date(2030, 1, 9)])
+        self.assertTrue(all(entry.id for entry in created))
+        self.assertEqual(LocalBodyCalendar.objects.filter(localbody=self.localbody).count(), 3)
+
+
+class ParseWindowTests(TestCase):
+
+    def _window(self, **params):
+        return parse_window(RequestFactory().get("/", params))
+
+    def test_valid_window(self):
+        self.assertEqual(
+            self._window(start="2030-01-01", end="2030-02-01T00:00:00+05:30"),
+            (date(2030, 1, 1), date(2030, 2, 1)),
+        )
+
+    def test_impossible_or_oversized_windows_are_rejected(self):
+        self.assertEqual(self._window(start="2030-02-30", end="2030-03-01"), (None, None))
+        self.assertEqual(self._window(start="not-a-date"), (None, None))
+        self.assertEqual(self._window(start="2030-01-01", end="2032-01-01"), (None, None))
+
+
+class GeographyTreeTests(TestCase):
+
+    def setUp(self):
+        invalidate_geography()
+        self.state = State.objects.create(name="Kerala")
+        self.district = District.objects.create(state=self.state, name="Thrissur")
+        LocalBody.objects.create(district=self.district, name="Thrissur Corporation")
+
+    def test_district_subtree(self):
+        body, etag = tree_payload(district_id=self.district.id)
+
+        self.assertEqual([lb["name"] for lb in json.loads(body)["data"]], ["Thrissur Corporation"])
+        self.assertTrue(etag)
+
+    def test_unknown_state_or_district(self):
+        self.assertEqual(tree_payload(state_id=self.state.id + 1000), (None, None))
+        self.assertEqual(tree_payload(district_id=self.district.id + 1000), (None, None))
+
+    def test_saving_a_local_body_refreshes_the_tree(self):
+        tree_payload(district_id=self.district.id)
+        LocalBody.objects.create(district=self.district, name="Chalakudy")
+
+        body, _ = tree_payload(district_id=self.district.id)
+        self.assertEqual(
+            [lb["name"] for lb in json.loads(body)["data"]], ["Chalakudy", "Thrissur Corporation"],
+        )
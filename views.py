@@ -154,12 +154,33 @@
 
 # #waste collector collect details from customer
 
-# @login_required
-# def view_collected_data(request):
-#     all_data = WasteCollection.objects.all()
-#     return render(request, 'view_collected_data.html', {
-#         'all_data': all_data
-#     })
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import HttpResponseBadRequest
+from django.shortcuts import render
+from waste_collector_dashboard.models import WasteCollection
+from .pagination import InvalidCursor, keyset_page
+from .replica import read_replica
+from .utils import is_super_admin
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@read_replica
+def view_collected_data(request):
+    try:
+        page = keyset_page(
+            WasteCollection.objects.select_related('collector', 'localbody'),
+            ('created_at', 'id'),
+            cursor=request.GET.get('cursor'),
+            per_page=50,
+            with_count=bool(request.GET.get('count')),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    return render(request, 'view_collected_data.html', {
+        'all_data': page,
+        'page': page,
+    })
 
 
 # # ////// MAP_ROLE
@@ -185,125 +206,278 @@
 
 
 
-# # ////////////////////////////      CALENDAR SET UP     ///////////////////////////////////
-
-
-# import json
-# from datetime import date, datetime, timedelta
-
-# from django.shortcuts import render, get_object_or_404, redirect
-# from django.http import JsonResponse, HttpResponseForbidden, HttpResponseBadRequest
-# from django.views.decorators.http import require_POST, require_GET
-# from django.contrib.auth.decorators import login_required, user_passes_test
-# from django.utils.dateparse import parse_date
-
-# from .models import State, District, LocalBody, LocalBodyCalendar
-# from .utils import is_super_admin
-
-
-
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# def calendar_view(request):
-#     """Main page where admin picks state/district/localbody and sees FullCalendar."""
-#     states = State.objects.all().order_by("name")
-#     return render(request, "calendar.html", {"states": states})
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_GET
-# def load_districts(request, state_id):
-#     districts = District.objects.filter(state_id=state_id).values("id", "name")
-#     return JsonResponse(list(districts), safe=False)
+# ////////////////////////////      CALENDAR SET UP     ///////////////////////////////////
 
 
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_GET
-# def load_localbodies(request, district_id):
-#     lbs = LocalBody.objects.filter(district_id=district_id).values("id", "name", "body_type")
-#     return JsonResponse(list(lbs), safe=False)
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_GET
-# def get_calendar_dates(request, localbody_id):
-#     events = LocalBodyCalendar.objects.filter(localbody_id=localbody_id).values("id", "date")
-#     # FullCalendar expects events with at least id and start
-#     data = [{"id": e["id"], "title": "Assigned", "start": e["date"].isoformat(), "color": "green"} for e in events]
-#     return JsonResponse(data, safe=False)
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_POST
-# def create_calendar_date(request, localbody_id):
-#     """Create one date or range. Expects 'date' in YYYY-MM-DD or 'start' & 'end' for ranges."""
-#     lb = get_object_or_404(LocalBody, pk=localbody_id)
-
-#     # support single-date or start/end
-#     start = request.POST.get("start")
-#     end = request.POST.get("end")
-#     single = request.POST.get("date")
-
-#     created = []
-#     if single:
-#         d = parse_date(single)
-#         if not d:
-#             return HttpResponseBadRequest("Invalid date")
-#         entry, created_flag = LocalBodyCalendar.objects.get_or_create(localbody=lb, date=d)
-#         if created_flag:
-#             created.append({"id": entry.id, "date": entry.date.isoformat()})
-#         return JsonResponse({"status": "created", "created": created})
-
-#     if start and end:
-#         s = parse_date(start)
-#         e = parse_date(end)
-#         if not s or not e:
-#             return HttpResponseBadRequest("Invalid start/end")
-#         cur = s
-#         while cur <= e:
-#             entry, created_flag = LocalBodyCalendar.objects.get_or_create(localbody=lb, date=cur)
-#             if created_flag:
-#                 created.append({"id": entry.id, "date": entry.date.isoformat()})
-#             cur += timedelta(days=1)
-#         return JsonResponse({"status": "created_range", "created": created})
-
-#     return HttpResponseBadRequest("Provide 'date' or 'start' and 'end'.")
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_POST
-# def update_calendar_date(request, pk):
-#     """Change date for an existing LocalBodyCalendar entry. Expect 'new_date' YYYY-MM-DD"""
-#     entry = get_object_or_404(LocalBodyCalendar, pk=pk)
-#     new_date_raw = request.POST.get("new_date")
-#     if not new_date_raw:
-#         return HttpResponseBadRequest("Missing new_date")
-#     new_date = parse_date(new_date_raw.split("T")[0])
-#     if not new_date:
-#         return HttpResponseBadRequest("Invalid date")
-#     # prevent duplicates: if another entry exists for that localbody on same date -> reject
-#     exists = LocalBodyCalendar.objects.filter(localbody=entry.localbody, date=new_date).exclude(pk=entry.pk).exists()
-#     if exists:
-#         return JsonResponse({"status": "conflict", "message": "Date already assigned"}, status=409)
-#     entry.date = new_date
-#     entry.save()
-#     return JsonResponse({"status": "updated", "id": entry.id, "date": entry.date.isoformat()})
-
-
-# @login_required
-# @user_passes_test(is_super_admin)
-# @require_POST
-# def delete_calendar_date(request, pk):
-#     entry = get_object_or_404(LocalBodyCalendar, pk=pk)
-#     entry.delete()
-#     return JsonResponse({"status": "deleted", "id": pk})
+from django.shortcuts import render, get_object_or_404, redirect
+from django.http import JsonResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_POST, require_GET
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.utils.dateparse import parse_date
+
+from .models import State, LocalBody, LocalBodyCalendar
+from .utils import is_super_admin
+from .scheduling import MAX_SCHEDULE_DAYS, bulk_schedule, expand_recurrence
+from .availability import calendar_dates, parse_window
+from django.db import IntegrityError, transaction
+from customer_dashboard.booking import booked_pickups
+from waste_collector_dashboard.models import PickupSlot
+from .geography import districts_for_state, geography_version, localbodies_for_district, tree_payload
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag
+
+
+def _to_date(value):
+    """parse_date that also returns None (instead of raising) for impossible dates like 2026-02-30."""
+    try:
+        return parse_date(value or "")
+    except ValueError:
+        return None
+
+
+
+
+@login_required
+@user_passes_test(is_super_admin)
+def calendar_view(request):
+    """Main page where admin picks state/district/localbody and sees FullCalendar."""
+    states = State.objects.all().order_by("name")
+    return render(request, "calendar.html", {"states": states})
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+@etag(lambda request, state_id: tree_payload(state_id=int(state_id))[1])
+def load_districts(request, state_id):
+    """Kept for calendar.html; new pages use geography_tree."""
+    districts = districts_for_state(state_id)
+    if districts is None:
+        return JsonResponse({"status": "error", "message": "Unknown state"}, status=404)
+    response = JsonResponse(districts, safe=False)
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+@etag(lambda request, district_id: tree_payload(district_id=int(district_id))[1])
+def load_localbodies(request, district_id):
+    """Kept for calendar.html; new pages use geography_tree."""
+    localbodies = localbodies_for_district(district_id)
+    if localbodies is None:
+        return JsonResponse({"status": "error", "message": "Unknown district"}, status=404)
+    response = JsonResponse(localbodies, safe=False)
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
+
+
+def _geography_scope(request):
+    state = request.GET.get("state")
+    district = request.GET.get("district")
+    return (
+        int(state) if state and state.isdigit() else None,
+        int(district) if district and district.isdigit() else None,
+    )
+
+
+def _geography_etag(request):
+    return tree_payload(*_geography_scope(request))[1]
+
+
+@login_required
+@require_GET
+@etag(_geography_etag)
+def geography_tree(request):
+    """
+    State -> District -> LocalBody tree (or ?state= / ?district= subtree) for every role,
+    served from the in-process cache. Requests carrying the current ?v= version are
+    cacheable for a year; others revalidate with the ETag.
+    """
+    state_id, district_id = _geography_scope(request)
+    body, _ = tree_payload(state_id, district_id)
+    if body is None:
+        return JsonResponse({"status": "error", "message": "Unknown state or district"}, status=404)
+    response = HttpResponse(body, content_type="application/json")
+    if request.GET.get("v") == geography_version():
+        patch_cache_control(response, private=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+def get_calendar_dates(request, localbody_id):
+    """Events inside the window FullCalendar asks for (?start=&end=)."""
+    start, end = parse_window(request)
+    if start is None:
+        return HttpResponseBadRequest("Invalid start/end")
+    # FullCalendar expects events with at least id and start
+    data = [
+        {"id": pk, "title": "Assigned", "start": d.isoformat(), "color": "green"}
+        for pk, d in calendar_dates(localbody_id, start, end)
+    ]
+    return JsonResponse(data, safe=False)
+
+
+def _parse_recurrence(request):
+    """Read optional 'weekday' (0=Mon .. 6=Sun) and 'skip_date' lists from the POST data."""
+    try:
+        weekdays = [int(w) for w in request.POST.getlist("weekday")]
+    except ValueError:
+        return None, None
+    if any(w < 0 or w > 6 for w in weekdays):
+        return None, None
+    skip_dates = [_to_date(s) for s in request.POST.getlist("skip_date")]
+    if any(s is None for s in skip_dates):
+        return None, None
+    return weekdays, skip_dates
+
+
+def _parse_range(start, end):
+    s = _to_date(start)
+    e = _to_date(end)
+    if not s or not e or e < s or (e - s).days > MAX_SCHEDULE_DAYS:
+        return None, None
+    return s, e
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def create_calendar_date(request, localbody_id):
+    """
+    Create one date or range. Expects 'date' in YYYY-MM-DD or 'start' & 'end' for ranges.
+    Ranges may be narrowed with 'weekday' and 'skip_date' lists.
+    """
+    lb = get_object_or_404(LocalBody, pk=localbody_id)
+
+    # support single-date or start/end
+    start = request.POST.get("start")
+    end = request.POST.get("end")
+    single = request.POST.get("date")
+
+    if single:
+        d = _to_date(single)
+        if not d:
+            return HttpResponseBadRequest("Invalid date")
+        entries = bulk_schedule([lb.id], [d])
+        created = [{"id": entry.id, "date": entry.date.isoformat()} for entry in entries]
+        return JsonResponse({"status": "created", "created": created})
+
+    if start and end:
+        s, e = _parse_range(start, end)
+        if not s:
+            return HttpResponseBadRequest("Invalid start/end")
+        weekdays, skip_dates = _parse_recurrence(request)
+        if weekdays is None:
+            return HttpResponseBadRequest("Invalid weekday/skip_date")
+        entries = bulk_schedule([lb.id], expand_recurrence(s, e, weekdays, skip_dates))
+        created = [{"id": entry.id, "date": entry.date.isoformat()} for entry in entries]
+        return JsonResponse({"status": "created_range", "created": created})
+
+    return HttpResponseBadRequest("Provide 'date' or 'start' and 'end'.")
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def bulk_schedule_calendar(request):
+    """
+    Schedule a recurring range for one or many local bodies in a single insert.
+    Expects 'localbody' (repeatable), 'start', 'end' and optional 'weekday' / 'skip_date' lists.
+    Existing dates are skipped.
+    """
+    try:
+        localbody_ids = [int(pk) for pk in request.POST.getlist("localbody")]
+    except ValueError:
+        return HttpResponseBadRequest("Invalid localbody")
+    if not localbody_ids:
+        return HttpResponseBadRequest("Provide at least one 'localbody'.")
+
+    s, e = _parse_range(request.POST.get("start"), request.POST.get("end"))
+    if not s:
+        return HttpResponseBadRequest("Invalid start/end")
+    weekdays, skip_dates = _parse_recurrence(request)
+    if weekdays is None:
+        return HttpResponseBadRequest("Invalid weekday/skip_date")
+
+    entries = bulk_schedule(localbody_ids, expand_recurrence(s, e, weekdays, skip_dates))
+    return JsonResponse({
+        "status": "scheduled",
+        "count": len(entries),
+        "created_ids": [entry.id for entry in entries],
+    })
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def update_calendar_date(request, pk):
+    """Change date for an existing LocalBodyCalendar entry. Expect 'new_date' YYYY-MM-DD"""
+    entry = get_object_or_404(LocalBodyCalendar, pk=pk)
+    new_date_raw = request.POST.get("new_date")
+    if not new_date_raw:
+        return HttpResponseBadRequest("Missing new_date")
+    new_date = _to_date(new_date_raw.split("T")[0])
+    if not new_date:
+        return HttpResponseBadRequest("Invalid date")
+    # prevent duplicates: if another entry exists for that localbody on same date -> reject
+    exists = LocalBodyCalendar.objects.filter(localbody=entry.localbody, date=new_date).exclude(pk=entry.pk).exists()
+    if exists:
+        return JsonResponse({"status": "conflict", "message": "Date already assigned"}, status=409)
+    entry.date = new_date
+    entry.save()
+    return JsonResponse({"status": "updated", "id": entry.id, "date": entry.date.isoformat()})
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def set_slot_capacity(request, pk):
+    """Set booking capacity for a calendar entry. Expects 'capacity' and optional 'ward'."""
+    entry = get_object_or_404(LocalBodyCalendar, pk=pk)
+    ward = request.POST.get("ward", "").strip()
+    try:
+        capacity = int(request.POST.get("capacity", ""))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid capacity")
+    if capacity < 0:
+        return HttpResponseBadRequest("Invalid capacity")
+
+    with transaction.atomic():
+        slot = PickupSlot.objects.select_for_update().filter(calendar=entry, ward=ward).first()
+        if slot is None:
+            # Pickups booked before the date had a slot still count against it
+            slot = PickupSlot(calendar=entry, ward=ward, booked=booked_pickups(entry.id, ward))
+        if capacity < slot.booked:
+            return JsonResponse(
+                {"status": "conflict", "message": f"{slot.booked} pickups already booked"}, status=409
+            )
+        slot.capacity = capacity
+        try:
+            with transaction.atomic():
+                slot.save()
+        except IntegrityError:
+            # A concurrent request created the slot first; ask again
+            return JsonResponse({"status": "conflict", "message": "Slot changed, try again"}, status=409)
+    return JsonResponse({
+        "status": "updated", "id": entry.id, "ward": ward,
+        "capacity": slot.capacity, "booked": slot.booked,
+    })
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def delete_calendar_date(request, pk):
+    entry = get_object_or_404(LocalBodyCalendar, pk=pk)
+    entry.delete()
+    return JsonResponse({"status": "deleted", "id": pk})
 
 
 
@@ -470,37 +644,266 @@
 #     })
 
 
-# from django.core.paginator import Paginator
-# from django.db.models import Q
-
-# @login_required
-# def waste_info_list(request):
-#     search_query = request.GET.get("q", "")   # search input
-#     page_number = request.GET.get("page", 1)  # current page
-
-#     # Fetch all customer waste profiles
-#     waste_infos = CustomerWasteInfo.objects.select_related(
-#         "state", "district", "localbody", "assigned_collector", "user"
-#     ).prefetch_related("customerpickupdate_set__localbody_calendar")
-
-#     # ✅ Search filter (name / phone / address)
-#     if search_query:
-#         waste_infos = waste_infos.filter(
-#             Q(user__first_name__icontains=search_query) |
-#             Q(user__last_name__icontains=search_query) |
-#             Q(user__contact_number__icontains=search_query) |
-#             Q(pickup_address__icontains=search_query)
-#         )
-
-#     # ✅ Pagination (10 profiles per page)
-#     paginator = Paginator(waste_infos.order_by("-id"), 10)
-#     page_obj = paginator.get_page(page_number)
-
-#     # Fetch all collectors
-#     collectors = CustomUser.objects.filter(role=1)
-
-#     return render(request, "waste_info_list.html", {
-#         "page_obj": page_obj,
-#         "collectors": collectors,
-#         "search_query": search_query,
-#     })
+from django.core.paginator import Paginator
+from authentication.models import CustomUser
+from customer_dashboard.models import CustomerWasteInfo
+from .search import search_profile_ids
+from .pagination import InvalidCursor, keyset_page
+
+@login_required
+@user_passes_test(is_super_admin)
+@read_replica
+def waste_info_list(request):
+    search_query = request.GET.get("q", "").strip()   # search input
+    page_number = request.GET.get("page", 1)  # current page
+
+    # Fetch all customer waste profiles
+    waste_infos = CustomerWasteInfo.objects.select_related(
+        "state", "district", "localbody", "assigned_collector", "user"
+    ).prefetch_related("customerpickupdate_set__localbody_calendar")
+
+    if search_query:
+        # ✅ Ranked ids from the search index (name / phone / address), at most 500
+        ranked_ids = search_profile_ids(search_query)
+        page_obj = Paginator(ranked_ids, 10).get_page(page_number)
+        by_id = waste_infos.in_bulk(list(page_obj.object_list))
+        page_obj.object_list = [by_id[pk] for pk in page_obj.object_list if pk in by_id]
+    else:
+        # ✅ Keyset pagination on id (10 profiles per page, no OFFSET / COUNT(*))
+        try:
+            page_obj = keyset_page(
+                waste_infos, ("id",),
+                cursor=request.GET.get("cursor"),
+                per_page=10,
+                with_count=bool(request.GET.get("count")),
+            )
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor")
+
+    # Fetch all collectors
+    collectors = CustomUser.objects.filter(role=1)
+
+    return render(request, "waste_info_list.html", {
+        "page_obj": page_obj,
+        "collectors": collectors,
+        "search_query": search_query,
+    })
+
+
+# ////////////////////////////      EXPORTS     ///////////////////////////////////
+
+from customer_dashboard.models import CustomerLocationHistory
+from .exports import stream_export
+
+COLLECTION_EXPORT_FIELDS = [
+    "id", "created_at", "collector_id", "collector__username", "customer_id", "customer__username",
+    "localbody_id", "localbody__name", "ward", "location", "building_no", "street_name", "kg", "rate_per_kg",
+    "total_amount",
+]
+PROFILE_EXPORT_FIELDS = [
+    "id", "created_at", "user_id", "full_name", "secondary_number", "pickup_address", "landmark",
+    "pincode", "latitude", "longitude", "localbody_id", "localbody__name", "ward",
+    "waste_type", "number_of_bags", "assigned_collector_id", "status",
+]
+LOCATION_EXPORT_FIELDS = [
+    "id", "changed_at", "waste_info_id", "latitude", "longitude", "changed_by_id",
+]
+
+
+def _export_filters(request):
+    """Parse ?start=&end= (YYYY-MM-DD), ?localbody= and ?collector=; None on bad input."""
+    start = _to_date(request.GET.get("start")) if request.GET.get("start") else None
+    end = _to_date(request.GET.get("end")) if request.GET.get("end") else None
+    if (request.GET.get("start") and not start) or (request.GET.get("end") and not end):
+        return None
+    localbody = request.GET.get("localbody", "").strip()
+    collector = request.GET.get("collector", "").strip()
+    if (localbody and not localbody.isdigit()) or (collector and not collector.isdigit()):
+        return None
+    return {"start": start, "end": end, "localbody": localbody, "collector": collector}
+
+
+def _date_range(queryset, field, filters):
+    if filters["start"]:
+        queryset = queryset.filter(**{f"{field}__date__gte": filters["start"]})
+    if filters["end"]:
+        queryset = queryset.filter(**{f"{field}__date__lte": filters["end"]})
+    return queryset
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+@read_replica
+def export_collections(request):
+    """Stream waste collections as ?format=csv or ndjson."""
+    filters = _export_filters(request)
+    if filters is None:
+        return HttpResponseBadRequest("Invalid filters")
+    collections = _date_range(WasteCollection.objects.order_by("id"), "created_at", filters)
+    if filters["localbody"]:
+        collections = collections.filter(localbody_id=filters["localbody"])
+    if filters["collector"]:
+        collections = collections.filter(collector_id=filters["collector"])
+    return stream_export(collections, COLLECTION_EXPORT_FIELDS, request.GET.get("format"), "collections")
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+@read_replica
+def export_waste_profiles(request):
+    """Stream customer waste profiles as ?format=csv or ndjson."""
+    filters = _export_filters(request)
+    if filters is None:
+        return HttpResponseBadRequest("Invalid filters")
+    profiles = _date_range(CustomerWasteInfo.objects.order_by("id"), "created_at", filters)
+    if filters["localbody"]:
+        profiles = profiles.filter(localbody_id=filters["localbody"])
+    if filters["collector"]:
+        profiles = profiles.filter(assigned_collector_id=filters["collector"])
+    return stream_export(profiles, PROFILE_EXPORT_FIELDS, request.GET.get("format"), "waste_profiles")
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+@read_replica
+def export_location_history(request):
+    """Stream customer location history as ?format=csv or ndjson."""
+    filters = _export_filters(request)
+    if filters is None:
+        return HttpResponseBadRequest("Invalid filters")
+    history = _date_range(CustomerLocationHistory.objects.order_by("id"), "changed_at", filters)
+    if filters["localbody"]:
+        history = history.filter(waste_info__localbody_id=filters["localbody"])
+    if filters["collector"]:
+        history = history.filter(waste_info__assigned_collector_id=filters["collector"])
+    return stream_export(history, LOCATION_EXPORT_FIELDS, request.GET.get("format"), "location_history")
+
+
+# ////////////////////////////      PROXIMITY     ///////////////////////////////////
+
+from waste_collector_dashboard.geo import nearby_from_request, points_in_bbox
+from waste_collector_dashboard.models import CustomerGeoPoint
+
+MAP_MAX_POINTS = 5000
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+def nearby_profiles(request):
+    """Profiles near a point: ?lat=&lng= with ?radius= (metres) or ?k=."""
+    data, error = nearby_from_request(request, CustomerGeoPoint.objects.all())
+    if error:
+        return JsonResponse({"status": "error", "message": error}, status=400)
+    return JsonResponse({"status": "success", "results": data})
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+def profiles_in_area(request):
+    """Map markers inside ?bbox=min_lat,min_lng,max_lat,max_lng (capped at MAP_MAX_POINTS)."""
+    try:
+        min_lat, min_lng, max_lat, max_lng = [float(v) for v in request.GET["bbox"].split(",")]
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Provide bbox=min_lat,min_lng,max_lat,max_lng")
+    if min_lat > max_lat or min_lng > max_lng:
+        return HttpResponseBadRequest("Invalid bbox")
+    points = points_in_bbox(min_lat, min_lng, max_lat, max_lng).values_list(
+        "waste_info_id", "latitude", "longitude"
+    )[:MAP_MAX_POINTS]
+    data = [{"id": pk, "latitude": lat, "longitude": lng} for pk, lat, lng in points]
+    return JsonResponse({"status": "success", "results": data, "truncated": len(data) == MAP_MAX_POINTS})
+
+
+# ////////////////////////////      BULK ASSIGNMENT     ///////////////////////////////////
+
+from django.contrib import messages
+from .assignment import assignment_queryset, bulk_assign
+from .auto_assignment import auto_assign
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def bulk_assign_collector(request):
+    """
+    Assign many waste profiles to one collector in a single UPDATE.
+    Expects 'collector' plus any of 'localbody', 'ward', 'ids' (repeatable),
+    'from_collector', 'unassigned_only'; 'dry_run' only reports counts.
+    Answers JSON for Accept: application/json, otherwise redirects with a message.
+    """
+    collector_id = request.POST.get("collector", "").strip()
+    localbody = request.POST.get("localbody", "").strip() or None
+    from_collector = request.POST.get("from_collector", "").strip() or None
+    if not collector_id.isdigit():
+        return HttpResponseBadRequest("Invalid collector")
+    if (localbody and not localbody.isdigit()) or (from_collector and not from_collector.isdigit()):
+        return HttpResponseBadRequest("Invalid localbody/from_collector")
+    try:
+        ids = [int(pk) for pk in request.POST.getlist("ids")]
+    except ValueError:
+        return HttpResponseBadRequest("Invalid ids")
+    collector = get_object_or_404(CustomUser, pk=collector_id, role=1)
+    ward = request.POST.get("ward") or None
+    if not (ids or localbody or ward or from_collector):
+        return HttpResponseBadRequest("Select profiles by localbody, ward, ids or from_collector.")
+
+    profiles = assignment_queryset(
+        localbody=localbody, ward=ward, ids=ids, from_collector=from_collector,
+        unassigned_only=bool(request.POST.get("unassigned_only")),
+    )
+    summary = bulk_assign(
+        collector, profiles, changed_by=request.user, dry_run=bool(request.POST.get("dry_run"))
+    )
+
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"status": "success", **summary})
+    messages.success(request, f"Assigned {summary['changed']} of {summary['matched']} profiles to {collector.username}.")
+    return redirect("super_admin_dashboard:waste_info_list")
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_POST
+def auto_assign_collectors(request):
+    """
+    Load-balanced auto-assignment of unassigned profiles for 'localbody' (repeatable).
+    Optional 'collectors' (repeatable) overrides the inferred collectors.
+    Dry run unless 'apply' is set; the plan summary is returned as JSON.
+    """
+    try:
+        localbody_ids = [int(pk) for pk in request.POST.getlist("localbody")]
+        collector_ids = [int(pk) for pk in request.POST.getlist("collectors")]
+    except ValueError:
+        return HttpResponseBadRequest("Invalid localbody/collectors")
+    if not localbody_ids:
+        return HttpResponseBadRequest("Provide at least one 'localbody'.")
+
+    report = auto_assign(
+        localbody_ids,
+        collector_ids=collector_ids or None,
+        dry_run=not request.POST.get("apply"),
+        changed_by=request.user,
+    )
+    return JsonResponse({"status": "success", "dry_run": not request.POST.get("apply"), "localbodies": report})
+
+
+# ////////////////////////////      COLLECTOR TRACKING     ///////////////////////////////////
+
+from waste_collector_dashboard.tracking import latest_positions
+
+
+@login_required
+@user_passes_test(is_super_admin)
+@require_GET
+def collector_positions(request):
+    """Latest known position of every collector, from the in-memory snapshot."""
+    data = [
+        {**position, "recorded_at": position["recorded_at"].isoformat()}
+        for position in latest_positions().values()
+    ]
+    return JsonResponse({"status": "success", "results": data})
@@ -1,12 +1,30 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .models import WasteCollection
+from .models import WasteCollection, CustomerGeoPoint
+from .geo import nearby_from_request
+from .routing import plan_route
 from .forms import WasteCollectionForm
+from .rates import get_rate_table
+from .stats import collector_stats
+from .sync import MAX_SYNC_BATCH, sync_collections
+from .tracking import MAX_PINGS_PER_REQUEST, ingest_pings
+from super_admin_dashboard.pagination import InvalidCursor, keyset_page
+from super_admin_dashboard.replica import read_replica
 from authentication.models import CustomUser
-import base64
-from django.core.files.base import ContentFile
-import uuid
-from customer_dashboard.models import CustomerWasteInfo
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import etag, require_GET, require_POST
+from .photos import (
+    PhotoUploadError, ensure_thumbnail, is_staged, schedule_processing, stage_request_body,
+    stage_uploaded_file, thumbnail_url,
+)
+from .storage import DIGEST_RE, photo_storage
+from customer_dashboard.models import CustomerWasteInfo, CustomerPickupDate
+from django.db.models import Exists, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 
 
@@ -15,14 +33,58 @@ def is_collector(user):
     return user.is_authenticated and user.role == 1
 
 
+def _date_param(request, name):
+    """?name=YYYY-MM-DD as a date, None when absent; ValueError when malformed or impossible."""
+    value = request.GET.get(name, '')
+    if not value:
+        return None
+    # parse_date itself raises ValueError for well-formed impossible dates like 2026-02-30
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
+
 # Waste Collector Dashboard View
 @login_required
 def dashboard(request):
     if not is_collector(request.user):
         return redirect('authentication:login')
 
-    waste_entries = WasteCollection.objects.filter(collector=request.user)
-    return render(request, 'waste_collector_dashboard.html', {'waste_entries': waste_entries})
+    # Aggregated figures only; the records themselves are paged by recent_collections
+    return render(request, 'waste_collector_dashboard.html', collector_stats(request.user.id))
+
+
+# Recent collections for the dashboard, one keyset page at a time (JSON)
+@login_required
+@require_GET
+def recent_collections(request):
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+    try:
+        page = keyset_page(
+            WasteCollection.objects.filter(collector=request.user).select_related('customer', 'localbody'),
+            ('created_at', 'id'),
+            cursor=request.GET.get('cursor'),
+            per_page=20,
+        )
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'status': 'success',
+        'results': [{
+            'id': c.id,
+            'customer': c.customer.username,
+            'localbody_id': c.localbody_id,
+            'localbody': c.localbody.name if c.localbody else None,
+            'ward': c.ward,
+            'kg': str(c.kg),
+            'total_amount': str(c.total_amount),
+            'thumbnail': thumbnail_url(c),
+            'created_at': c.created_at.isoformat(),
+        } for c in page],
+        'next_cursor': page.next_cursor,
+    })
 
 
 # List all waste collection records for the logged-in collector
@@ -31,8 +93,15 @@ def collection_list(request):
     if not is_collector(request.user):
         return redirect('authentication:login')
 
-    collections = WasteCollection.objects.filter(collector=request.user)
-    return render(request, 'waste_collect_list.html', {'collections': collections})
+    try:
+        page = keyset_page(
+            WasteCollection.objects.filter(collector=request.user).select_related('customer', 'localbody'),
+            ('created_at', 'id'),
+            cursor=request.GET.get('cursor'),
+        )
+    except InvalidCursor:
+        return redirect('waste_collector:waste_collect_list')
+    return render(request, 'waste_collect_list.html', {'collections': page, 'page': page})
 
 
 # def collection_create(request):
@@ -69,6 +138,60 @@ def collection_list(request):
 #     return render(request, 'waste_collect_form.html', {'form': form})
 
 
+def _stage_form_photo(request, form):
+    """Return the staged photo for a collection form, from an upload id or a multipart file."""
+    upload_id = form.cleaned_data.get('photo_upload_id')
+    if upload_id:
+        if not is_staged(upload_id):
+            raise PhotoUploadError("Uploaded photo not found, please capture it again.")
+        return upload_id
+    photo_file = request.FILES.get('photo_file')
+    if photo_file:
+        return stage_uploaded_file(photo_file)
+    return None
+
+
+# Thumbnail of a content-addressed photo, generated on first request.
+# The URL names the photo's content hash, so responses never change and cache for a year.
+@login_required
+@require_GET
+@etag(lambda request, digest: digest)
+def collection_photo_thumbnail(request, digest):
+    if not DIGEST_RE.match(digest):
+        raise Http404
+    name = ensure_thumbnail(digest)
+    if name is None:
+        raise Http404
+    response = FileResponse(photo_storage.open(name, 'rb'), content_type='image/jpeg')
+    patch_cache_control(response, private=True, max_age=31536000, immutable=True)
+    return response
+
+
+@login_required
+@require_POST
+def collection_photo_upload(request):
+    """
+    Dedicated photo ingestion endpoint for the collector app.
+    Accepts a multipart 'photo' file or a raw image/* body, streamed to storage in chunks.
+    Returns an upload id to send as 'photo_upload_id' with the collection form.
+    """
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+
+    try:
+        if request.content_type == 'multipart/form-data':
+            photo = request.FILES.get('photo')
+            if photo is None:
+                raise PhotoUploadError("No photo uploaded.")
+            upload_id = stage_uploaded_file(photo)
+        else:
+            upload_id = stage_request_body(request)
+    except PhotoUploadError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    return JsonResponse({'status': 'success', 'upload_id': upload_id})
+
+
 @login_required
 def collection_create(request):
     try:
@@ -89,16 +212,18 @@ def collection_create(request):
                 # The rate_per_kg and total_amount will be calculated in the model's save method
                 # based on the local body's rate
 
-                # Handle base64 photo
-                photo_data = request.POST.get('photo_data')
-                if photo_data:
-                    format, imgstr = photo_data.split(';base64,')
-                    ext = format.split('/')[-1]
-                    file_name = f"{uuid.uuid4()}.{ext}"
-                    instance.photo.save(file_name, ContentFile(base64.b64decode(imgstr)), save=False)
-
-                instance.save()
-                return redirect('super_admin_dashboard:waste_collector_dashboard')
+                # Stage the photo; recompression and thumbnails run on the photo worker pool
+                staged_name = None
+                try:
+                    staged_name = _stage_form_photo(request, form)
+                except PhotoUploadError as e:
+                    form.add_error(None, str(e))
+
+                if staged_name:
+                    instance.photo.name = staged_name
+                    instance.save()
+                    schedule_processing(instance.pk, staged_name)
+                    return redirect('super_admin_dashboard:waste_collector_dashboard')
             # If form is invalid, fall through to render the form with errors
         else:
             # Initialize form with default values
@@ -169,19 +294,10 @@ def collection_create(request):
         if form is None:
             form = WasteCollectionForm()
 
-        # Get local body rates for display in the form
-        localbody_rates = {}
-        try:
-            localbodies = LocalBody.objects.all()
-            for localbody in localbodies:
-                try:
-                    rate_info = localbody.rate_info
-                    localbody_rates[localbody.id] = float(rate_info.rate_per_kg)
-                except:
-                    localbody_rates[localbody.id] = 50.00  # Default rate
-        except Exception as e:
-            # If there's any error getting localbody rates, use empty dict
-            localbody_rates = {}
+        # Get local body rates for display in the form (cached, one query per reload)
+        localbody_rates = {
+            localbody_id: float(rate) for localbody_id, rate in get_rate_table().items()
+        }
 
         return render(request, 'waste_collect_form.html', {
             'form': form,
@@ -204,6 +320,49 @@ def collection_create(request):
 
 
 
+@login_required
+@require_POST
+def collection_sync(request):
+    """
+    Flush the collector app's offline queue in one request.
+    Body: {"collections": [{client_key, customer, localbody, ward, location, building_no,
+    street_name, kg, photo_upload_id}, ...]}. Answers with one result per item.
+    """
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+    try:
+        items = json.loads(request.body).get('collections')
+    except (ValueError, AttributeError):
+        items = None
+    if not isinstance(items, list):
+        return JsonResponse({'status': 'error', 'message': 'Expected {"collections": [...]}'}, status=400)
+    if len(items) > MAX_SYNC_BATCH:
+        return JsonResponse(
+            {'status': 'error', 'message': f'At most {MAX_SYNC_BATCH} collections per request'}, status=400
+        )
+    return JsonResponse({'status': 'success', 'results': sync_collections(request.user, items)})
+
+
+@login_required
+@require_POST
+def collector_pings(request):
+    """Batched GPS fixes from the collector app: {"pings": [{t, lat, lng, acc}, ...]}."""
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+    try:
+        pings = json.loads(request.body).get('pings')
+    except (ValueError, AttributeError):
+        pings = None
+    if not isinstance(pings, list):
+        return JsonResponse({'status': 'error', 'message': 'Expected {"pings": [...]}'}, status=400)
+    if len(pings) > MAX_PINGS_PER_REQUEST:
+        return JsonResponse(
+            {'status': 'error', 'message': f'At most {MAX_PINGS_PER_REQUEST} pings per request'}, status=400
+        )
+    accepted, rejected = ingest_pings(request.user, pings)
+    return JsonResponse({'status': 'success', 'accepted': accepted, 'rejected': rejected})
+
+
 @login_required
 def collection_update(request, pk):
     if not is_collector(request.user):
@@ -212,8 +371,17 @@ def collection_update(request, pk):
     waste = get_object_or_404(WasteCollection, pk=pk, collector=request.user)
     form = WasteCollectionForm(request.POST or None, request.FILES or None, instance=waste)
     if form.is_valid():
-        form.save()
-        return redirect('waste_collector:waste_collector_dashboard')
+        try:
+            staged_name = _stage_form_photo(request, form)
+        except PhotoUploadError as e:
+            form.add_error(None, str(e))
+        else:
+            if staged_name:
+                waste.photo.name = staged_name
+            form.save()
+            if staged_name:
+                schedule_processing(waste.pk, staged_name)
+            return redirect('waste_collector:waste_collector_dashboard')
     return render(request, 'waste_collect_form.html', {'form': form})
 
 
@@ -236,12 +404,57 @@ def collection_delete(request, pk):
 
 
 
+ASSIGNED_PAGE_SIZE = 50
+
+
 @login_required
 def assigned_waste_customers(request):
+    """
+    Assigned households for the logged-in collector, one keyset page at a time.
+    Optional filters: ?date=YYYY-MM-DD (booked pickup date) and ?ward=.
+    Pass ?cursor=<next_cursor> to fetch the next page.
+    """
     collector = request.user
-    assigned_customers = CustomerWasteInfo.objects.filter(assigned_collector=collector)
+    try:
+        pickup_date = _date_param(request, 'date')
+    except ValueError:
+        return HttpResponseBadRequest('Invalid date')
+    ward = request.GET.get('ward', '').strip()
+
+    upcoming = CustomerPickupDate.objects.filter(
+        waste_info=OuterRef('pk'),
+        localbody_calendar__date__gte=timezone.localdate(),
+    ).order_by('localbody_calendar__date')
+
+    assigned_customers = CustomerWasteInfo.objects.filter(
+        assigned_collector=collector
+    ).select_related(
+        'user', 'state', 'district', 'localbody'
+    ).annotate(
+        next_pickup_date=Subquery(upcoming.values('localbody_calendar__date')[:1]),
+        next_pickup_calendar_id=Subquery(upcoming.values('localbody_calendar_id')[:1]),
+    )
+
+    if pickup_date:
+        assigned_customers = assigned_customers.filter(Exists(
+            CustomerPickupDate.objects.filter(
+                waste_info=OuterRef('pk'),
+                localbody_calendar__date=pickup_date,
+            )
+        ))
+    if ward:
+        assigned_customers = assigned_customers.filter(ward=ward)
+
+    try:
+        page = keyset_page(assigned_customers, ('id',), cursor=request.GET.get('cursor'), per_page=ASSIGNED_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+
     return render(request, 'assigned_customers_details.html', {
-        'assigned_customers': assigned_customers
+        'assigned_customers': page,
+        'page': page,
+        'filter_date': pickup_date,
+        'filter_ward': ward,
     })
 
 
@@ -268,62 +481,149 @@ def assigned_waste_customers(request):
 
 
 @login_required
-def billing_dashboard(request):
-    """Display billing statistics and impact data"""
-    # Get current month's collections
-    from django.utils import timezone
-    from django.db.models import Sum, Count
-    import calendar
-
-    today = timezone.now()
-    start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-    # Get this month's collections
-    monthly_collections = WasteCollection.objects.filter(
-        created_at__gte=start_of_month
+@require_GET
+def nearby_customers(request):
+    """Assigned households near the collector's position, nearest first."""
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+    points = CustomerGeoPoint.objects.filter(waste_info__assigned_collector=request.user)
+    data, error = nearby_from_request(request, points)
+    if error:
+        return JsonResponse({'status': 'error', 'message': error}, status=400)
+    return JsonResponse({'status': 'success', 'results': data})
+
+
+@login_required
+@require_GET
+def collector_route(request):
+    """
+    Ordered pickup route for the collector's households booked on one calendar date.
+    ?date=YYYY-MM-DD (default today) or ?calendar_id=; optional ?lat=&lng= start position.
+    """
+    if not is_collector(request.user):
+        return JsonResponse({'status': 'error', 'message': 'Forbidden'}, status=403)
+
+    profiles = CustomerWasteInfo.objects.filter(assigned_collector=request.user)
+    calendar_id = request.GET.get('calendar_id')
+    if calendar_id:
+        if not calendar_id.isdigit():
+            return JsonResponse({'status': 'error', 'message': 'Invalid calendar_id'}, status=400)
+        booked = CustomerPickupDate.objects.filter(waste_info=OuterRef('pk'), localbody_calendar_id=calendar_id)
+    else:
+        try:
+            route_date = _date_param(request, 'date') or timezone.localdate()
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid date'}, status=400)
+        booked = CustomerPickupDate.objects.filter(waste_info=OuterRef('pk'), localbody_calendar__date=route_date)
+    profiles = profiles.filter(Exists(booked))
+
+    start = None
+    if request.GET.get('lat') and request.GET.get('lng'):
+        try:
+            start = (float(request.GET['lat']), float(request.GET['lng']))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': 'Invalid start position'}, status=400)
+
+    rows = list(profiles.values('id', 'full_name', 'pickup_address', 'ward', 'latitude', 'longitude'))
+    located = {r['id']: r for r in rows if r['latitude'] is not None and r['longitude'] is not None}
+    order, legs = plan_route(
+        [(pk, float(r['latitude']), float(r['longitude'])) for pk, r in located.items()],
+        start=start,
     )
 
-    # Calculate statistics
-    total_weight = monthly_collections.aggregate(
-        total=Sum('kg')
-    )['total'] or 0
+    stops = []
+    travelled = 0.0
+    for pk, leg in zip(order, legs):
+        r = located[pk]
+        travelled += leg
+        stops.append({
+            'id': pk,
+            'full_name': r['full_name'],
+            'pickup_address': r['pickup_address'],
+            'ward': r['ward'],
+            'latitude': float(r['latitude']),
+            'longitude': float(r['longitude']),
+            'leg_m': round(leg, 1),
+            'cumulative_m': round(travelled, 1),
+        })
 
-    total_revenue = monthly_collections.aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
+    return JsonResponse({
+        'status': 'success',
+        'stops': stops,
+        'total_distance_m': round(travelled, 1),
+        # Households without coordinates cannot be routed
+        'unrouted': [r['id'] for r in rows if r['id'] not in located],
+    })
 
-    collection_count = monthly_collections.count()
 
-    # Group by local body for regional analysis
-    localbody_stats = monthly_collections.values(
-        'localbody__name'
-    ).annotate(
-        total_weight=Sum('kg'),
-        total_revenue=Sum('total_amount'),
-        count=Count('id')
+@login_required
+@read_replica
+def billing_dashboard(request):
+    """
+    Display billing statistics and impact data.
+    Reads the daily rollup table; ?start= and ?end= (YYYY-MM-DD) pick the range,
+    defaulting to the current month.
+    """
+    from django.db.models import Sum
+    from .models import DailyCollectionSummary
+    from .rollups import month_range
+
+    default_start, default_end = month_range()
+    try:
+        start = _date_param(request, 'start') or default_start
+        end = _date_param(request, 'end') or default_end
+    except ValueError:
+        return HttpResponseBadRequest('Invalid start/end date')
+    if start > end:
+        return HttpResponseBadRequest('start must not be after end')
+
+    summaries = DailyCollectionSummary.objects.filter(date__range=(start, end))
+
+    # Calculate statistics
+    totals = summaries.aggregate(
+        total_weight=Sum('total_kg'),
+        total_revenue=Sum('total_revenue'),
+        collection_count=Sum('collection_count'),
+    )
+
+    # Group by local body for regional analysis (integer FK join)
+    grouped = summaries.values('localbody_id', 'localbody__name').annotate(
+        total_weight=Sum('total_kg'),
+        total_revenue=Sum('total_revenue'),
+        count=Sum('collection_count')
     ).order_by('-total_revenue')
 
-    # Prepare data for charts
+    localbody_stats = []
     chart_data = []
-    for stat in localbody_stats:
+    for stat in grouped:
+        name = stat['localbody__name'] or 'Unassigned'
+        localbody_stats.append({
+            'localbody__name': name,
+            'total_weight': stat['total_weight'],
+            'total_revenue': stat['total_revenue'],
+            'count': stat['count'],
+        })
         chart_data.append({
-            'localbody': stat['localbody__name'],
+            'localbody': name,
             'weight': float(stat['total_weight']),
             'revenue': float(stat['total_revenue']),
             'collections': stat['count']
         })
 
+    if (start, end) == (default_start, default_end):
+        period_label = start.strftime('%B %Y')
+    else:
+        period_label = f"{start:%d %b %Y} - {end:%d %b %Y}"
+
     context = {
-        'total_weight': total_weight,
-        'total_revenue': total_revenue,
-        'collection_count': collection_count,
+        'total_weight': totals['total_weight'] or 0,
+        'total_revenue': totals['total_revenue'] or 0,
+        'collection_count': totals['collection_count'] or 0,
         'localbody_stats': localbody_stats,
         'chart_data': chart_data,
-        'current_month': today.strftime('%B %Y')
+        'current_month': period_label,
+        'start_date': start,
+        'end_date': end,
     }
 
     return render(request, 'billing_dashboard.html', context)
-
-
-
-
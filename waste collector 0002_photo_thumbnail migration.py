@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste_collector_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastecollection',
+            name='photo_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='collection_photos/thumbs/'),
+        ),
+    ]
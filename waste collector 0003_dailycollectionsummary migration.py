@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('waste_collector_dashboard', '0002_photo_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCollectionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                # The local body string WasteCollection stores; 0010 turns both into foreign keys
+                ('localbody', models.CharField(max_length=100)),
+                ('ward', models.CharField(max_length=50)),
+                ('total_kg', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('collection_count', models.PositiveIntegerField(default=0)),
+                ('collector', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries',
+                    to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'unique_together': {('date', 'localbody', 'ward', 'collector')},
+                'indexes': [models.Index(fields=['date', 'localbody'], name='daily_summary_date_lb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_dashboard', '0001_initial'),
+        ('waste_collector_dashboard', '0003_dailycollectionsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerGeoPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geohash', models.CharField(db_index=True, max_length=12)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('waste_info', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='geo_point',
+                    to='customer_dashboard.customerwasteinfo',
+                )),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin_dashboard', '0001_initial'),
+        ('waste_collector_dashboard', '0004_customergeopoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PickupSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ward', models.CharField(blank=True, default='', max_length=50)),
+                ('capacity', models.PositiveIntegerField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('calendar', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='slots',
+                    to='super_admin_dashboard.localbodycalendar',
+                )),
+            ],
+            options={
+                'unique_together': {('calendar', 'ward')},
+                'constraints': [
+                    models.CheckConstraint(
+                        check=models.Q(booked__lte=models.F('capacity')), name='pickup_slot_not_overbooked',
+                    ),
+                ],
+            },
+        ),
+    ]
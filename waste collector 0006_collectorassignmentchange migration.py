@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('customer_dashboard', '0001_initial'),
+        ('waste_collector_dashboard', '0005_pickupslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectorAssignmentChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.UUIDField(db_index=True)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(
+                    blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+',
+                    to=settings.AUTH_USER_MODEL,
+                )),
+                ('new_collector', models.ForeignKey(
+                    null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+',
+                    to=settings.AUTH_USER_MODEL,
+                )),
+                ('previous_collector', models.ForeignKey(
+                    blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+',
+                    to=settings.AUTH_USER_MODEL,
+                )),
+                ('waste_info', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='assignment_changes',
+                    to='customer_dashboard.customerwasteinfo',
+                )),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste_collector_dashboard', '0006_collectorassignmentchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastecollection',
+            name='client_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='wastecollection',
+            constraint=models.UniqueConstraint(
+                fields=('collector', 'client_key'), name='waste_collection_unique_client_key',
+            ),
+        ),
+    ]
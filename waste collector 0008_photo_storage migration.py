@@ -0,0 +1,20 @@
+from django.db import migrations, models
+import waste_collector_dashboard.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste_collector_dashboard', '0007_client_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wastecollection',
+            name='photo',
+            field=models.ImageField(
+                blank=True, null=True, upload_to='collection_photos/',
+                storage=waste_collector_dashboard.storage.ContentAddressedStorage(),
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('waste_collector_dashboard', '0008_photo_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectorPing',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('recorded_at', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('accuracy', models.FloatField(blank=True, null=True)),
+                ('collector', models.ForeignKey(
+                    db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pings',
+                    to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'indexes': [models.Index(fields=['collector', 'recorded_at'], name='collector_ping_track_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,134 @@
+from django.db import migrations, models
+from django.db.models.functions import Cast
+import django.db.models.deletion
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+
+def _localbody_lookup(LocalBody):
+    """
+    Map the strings stored so far (an id, or a name in any case) to LocalBody ids.
+    A name shared by several local bodies (in different districts) is left out:
+    the collection does not say which one it meant, so it stays unresolved.
+    """
+    by_name = {}
+    lookup = {}
+    for pk, name in LocalBody.objects.values_list('id', 'name').iterator():
+        by_name.setdefault((name or '').strip().lower(), []).append(pk)
+        lookup[str(pk)] = pk
+    for name, pks in by_name.items():
+        if len(pks) == 1:
+            lookup.setdefault(name, pks[0])
+    return lookup
+
+
+def _resolve_table(model, lookup, batch_size=BATCH_SIZE):
+    """
+    Walk model in primary-key batches, one UPDATE per resolved local body per batch.
+    Each batch commits on its own so a large table never holds one long transaction.
+    """
+    last_pk = 0
+    unresolved = 0
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'localbody')[:batch_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        by_localbody = {}
+        for pk, value in rows:
+            localbody_id = lookup.get((value or '').strip().lower())
+            if localbody_id is None:
+                unresolved += 1
+                continue
+            by_localbody.setdefault(localbody_id, []).append(pk)
+        for localbody_id, pks in by_localbody.items():
+            model.objects.filter(pk__in=pks).update(localbody_ref_id=localbody_id)
+    return unresolved
+
+
+def forwards(apps, schema_editor):
+    lookup = _localbody_lookup(apps.get_model('super_admin_dashboard', 'LocalBody'))
+    WasteCollection = apps.get_model('waste_collector_dashboard', 'WasteCollection')
+    unresolved = _resolve_table(WasteCollection, lookup)
+    if unresolved:
+        logger.warning(
+            "%s collections with an unknown or ambiguous local body left without one", unresolved
+        )
+
+
+def backwards(apps, schema_editor):
+    WasteCollection = apps.get_model('waste_collector_dashboard', 'WasteCollection')
+    WasteCollection.objects.filter(localbody_ref__isnull=False).update(
+        localbody=Cast('localbody_ref_id', models.CharField(max_length=100))
+    )
+
+
+def clear_summaries(apps, schema_editor):
+    # Derived data: emptied so the column can change type, refilled by rebuild_collection_rollups
+    apps.get_model('waste_collector_dashboard', 'DailyCollectionSummary').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    # Batches commit as they go; see _resolve_table
+    atomic = False
+
+    dependencies = [
+        ('super_admin_dashboard', '0001_initial'),
+        ('waste_collector_dashboard', '0009_collectorping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastecollection',
+            name='localbody_ref',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='+', to='super_admin_dashboard.localbody',
+            ),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(model_name='wastecollection', name='localbody'),
+        migrations.RenameField(model_name='wastecollection', old_name='localbody_ref', new_name='localbody'),
+        migrations.AlterField(
+            model_name='wastecollection',
+            name='localbody',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT,
+                related_name='waste_collections', to='super_admin_dashboard.localbody',
+            ),
+        ),
+        migrations.RunPython(clear_summaries, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dailycollectionsummary',
+            name='localbody',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE,
+                related_name='+', to='super_admin_dashboard.localbody',
+            ),
+        ),
+        # unique_together never matched rows without a local body; see DailyCollectionSummary.Meta
+        migrations.AlterUniqueTogether(name='dailycollectionsummary', unique_together=set()),
+        migrations.AddConstraint(
+            model_name='dailycollectionsummary',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(localbody__isnull=False),
+                fields=('date', 'localbody', 'ward', 'collector'),
+                name='daily_summary_unique_key',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycollectionsummary',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(localbody__isnull=True),
+                fields=('date', 'ward', 'collector'),
+                name='daily_summary_unique_key_no_localbody',
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('super_admin_dashboard', '0001_initial'),
+        ('waste_collector_dashboard', '0010_localbody_foreign_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastecollection',
+            name='rate_per_kg',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.CreateModel(
+            name='LocalBodyRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rate_per_kg', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('effective_from', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('localbody', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='rate_versions',
+                    to='super_admin_dashboard.localbody',
+                )),
+            ],
+            options={
+                'ordering': ['localbody', 'effective_from'],
+                'unique_together': {('localbody', 'effective_from')},
+            },
+        ),
+    ]
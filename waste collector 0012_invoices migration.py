@@ -0,0 +1,51 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste_collector_dashboard', '0011_rate_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('localbodies', models.CharField(blank=True, default='', max_length=1000)),
+                ('status', models.CharField(
+                    choices=[('planned', 'Planned'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')],
+                    default='planned', max_length=10,
+                )),
+                ('total_customers', models.PositiveIntegerField(default=0)),
+                ('done_customers', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'unique_together': {('month', 'localbodies')},
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('first_customer_id', models.IntegerField()),
+                ('last_customer_id', models.IntegerField()),
+                ('customers', models.PositiveIntegerField()),
+                ('done', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='chunks',
+                    to='waste_collector_dashboard.invoicerun',
+                )),
+            ],
+            options={
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
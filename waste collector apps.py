@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class WasteCollectorDashboardConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'waste_collector_dashboard'
+
+    def ready(self):
+        # Rate table invalidation and geo point syncing receivers
+        from . import geo, rates
+
+        geo.connect_signals()
+        rates.connect_signals()
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from waste_collector_dashboard.tracking import compact_tracks
+
+
+class Command(BaseCommand):
+    help = "Downsample collector GPS tracks older than a cutoff to one point per bucket."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=24)
+        parser.add_argument('--bucket-seconds', type=int, default=60)
+        parser.add_argument('--lookback-days', type=int, default=7,
+                            help="Only rescan this many days before the cutoff (earlier ones are already thin).")
+        parser.add_argument('--all', action='store_true', help="Scan the whole history.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(hours=options['older_than_hours'])
+        since = None if options['all'] else before - timedelta(days=options['lookback_days'])
+        examined, deleted = compact_tracks(
+            before, since=since, bucket_seconds=options['bucket_seconds'], batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Examined {examined} pings, removed {deleted}."))
@@ -8,7 +8,9 @@ from authentication.models import CustomUser
 
 class WasteCollectionForm(forms.ModelForm):
 
-    photo_data = forms.CharField(widget=forms.HiddenInput(), required=True)
+    # Id returned by the photo upload endpoint; the form may instead carry the
+    # camera shot directly as a multipart 'photo_file'
+    photo_upload_id = forms.CharField(widget=forms.HiddenInput(), required=False)
 
     class Meta:
         model = WasteCollection
@@ -17,7 +19,6 @@ class WasteCollectionForm(forms.ModelForm):
             'street_name', 'kg'
         ]
         widgets = {
-            'localbody': forms.TextInput(attrs={'required': True}),
             'ward': forms.TextInput(attrs={'required': True}),
             'location': forms.TextInput(attrs={'required': True}),
             'building_no': forms.TextInput(attrs={'required': True}),
@@ -32,8 +33,8 @@ class WasteCollectionForm(forms.ModelForm):
 
     def clean(self):
         cleaned_data = super().clean()
-        photo_data = self.data.get('photo_data')
-        if not photo_data:
+        has_photo = self.data.get('photo_upload_id') or self.files.get('photo_file')
+        if not has_photo and not self.instance.photo:
             raise forms.ValidationError("Please capture a photo using the camera before submitting.")
         return cleaned_data
 
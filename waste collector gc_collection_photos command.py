@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from waste_collector_dashboard.photos import collect_garbage, process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Process photos left in staging by lost jobs, then delete collection photos, "
+        "thumbnails and staged uploads that no collection refers to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help="Keep files modified more recently than this.")
+        parser.add_argument('--pending-minutes', type=int, default=10,
+                            help="Process staged photos of collections older than this.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            processed = process_pending(min_age_seconds=options['pending_minutes'] * 60)
+            self.stdout.write(f"Processed {processed} photos left in staging.")
+        examined, deleted = collect_garbage(
+            grace_seconds=options['grace_hours'] * 3600, dry_run=options['dry_run'],
+        )
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} of {examined} photo files."))
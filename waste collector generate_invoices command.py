@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from waste_collector_dashboard.invoicing import INVOICE_CHUNK_SIZE, INVOICE_WORKERS, execute_run, plan_run
+
+
+class Command(BaseCommand):
+    help = "Generate monthly household invoices in parallel; re-run the same command to resume."
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help="Month to invoice (YYYY-MM).")
+        parser.add_argument('--localbody', type=int, nargs='*', default=[], help="Local body ids (default: all).")
+        parser.add_argument('--workers', type=int, default=INVOICE_WORKERS)
+        parser.add_argument('--chunk-size', type=int, default=INVOICE_CHUNK_SIZE)
+        parser.add_argument('--replan', action='store_true',
+                            help="Discard an existing run for this month and start it over.")
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options['month'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError("Invalid month, expected YYYY-MM")
+
+        run = plan_run(
+            month, options['localbody'], chunk_size=options['chunk_size'], replan=options['replan'],
+        )
+        self.stdout.write(
+            f"Run {run.pk}: {run.total_customers} customers, {run.done_customers} already invoiced."
+        )
+
+        def progress(done, total):
+            self.stdout.write(f"  chunk {done}/{total}")
+
+        if run.status == 'done':
+            self.stdout.write("This run already finished; pass --replan to generate it again.")
+        path = execute_run(run, workers=options['workers'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Invoices written; summary at {path}"))
@@ -0,0 +1,223 @@
+import math
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db.models import Q
+from django.db.models.signals import post_save
+
+from customer_dashboard.models import CustomerWasteInfo
+from .models import CustomerGeoPoint
+
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320.0
+GEOHASH_PRECISION = 9          # ~5 m cells
+MAX_COVER_CELLS = 32           # prefixes per bounding-box query
+MAX_SEARCH_RADIUS_M = 50000
+NEARBY_DEFAULT_RADIUS_M = 500
+NEARBY_MAX_RESULTS = 200
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lng_lo = mid
+            else:
+                value <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def _cell_size(precision):
+    """(lat_step, lng_step) in degrees of a geohash cell."""
+    total = 5 * precision
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_COVER_CELLS):
+    """Geohash prefixes whose cells together cover the bounding box."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = _cell_size(precision)
+        lat_first = math.floor((min_lat + 90) / lat_step)
+        lat_last = math.floor((max_lat + 90) / lat_step)
+        lng_first = math.floor((min_lng + 180) / lng_step)
+        lng_last = math.floor((max_lng + 180) / lng_step)
+        if (lat_last - lat_first + 1) * (lng_last - lng_first + 1) > max_cells:
+            continue
+        cells = set()
+        for i in range(lat_first, lat_last + 1):
+            for j in range(lng_first, lng_last + 1):
+                cells.add(geohash_encode(
+                    min(-90 + (i + 0.5) * lat_step, 90.0),
+                    min(-180 + (j + 0.5) * lng_step, 180.0),
+                    precision,
+                ))
+        return sorted(cells)
+    return [""]
+
+
+def haversine_m(latitude, longitude, latitudes, longitudes):
+    """Vectorized great-circle distance in metres from one point to arrays of points."""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(longitudes, dtype=float)) - np.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(latitude, longitude, radius_m):
+    dlat = radius_m / METERS_PER_DEGREE
+    dlng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return (
+        max(latitude - dlat, -90.0), max(longitude - dlng, -180.0),
+        min(latitude + dlat, 90.0), min(longitude + dlng, 180.0),
+    )
+
+
+def points_in_bbox(min_lat, min_lng, max_lat, max_lng, queryset=None):
+    """Geo points inside a bounding box: geohash prefix scan, then exact coordinate filter."""
+    queryset = CustomerGeoPoint.objects.all() if queryset is None else queryset
+    prefixes = covering_cells(min_lat, min_lng, max_lat, max_lng)
+    return queryset.filter(
+        reduce(or_, (Q(geohash__startswith=p) for p in prefixes)),
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+
+
+def profiles_within(latitude, longitude, radius_m, queryset=None, limit=None):
+    """
+    [(waste_info_id, distance_m)] within radius_m, nearest first.
+    queryset narrows the CustomerGeoPoint candidates (e.g. to one collector).
+    """
+    candidates = points_in_bbox(*bounding_box(latitude, longitude, radius_m), queryset=queryset)
+    rows = list(candidates.values_list("waste_info_id", "latitude", "longitude"))
+    if not rows:
+        return []
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    distances = haversine_m(latitude, longitude, [r[1] for r in rows], [r[2] for r in rows])
+    inside = distances <= radius_m
+    ids, distances = ids[inside], distances[inside]
+    order = np.argsort(distances, kind="stable")
+    if limit:
+        order = order[:limit]
+    return [(int(ids[i]), float(distances[i])) for i in order]
+
+
+def nearest_profiles(latitude, longitude, k, queryset=None, start_radius_m=250):
+    """k nearest profiles, growing the search radius until enough are found."""
+    radius = start_radius_m
+    while True:
+        found = profiles_within(latitude, longitude, radius, queryset=queryset, limit=k)
+        if len(found) >= k or radius >= MAX_SEARCH_RADIUS_M:
+            return found
+        radius *= 4
+
+
+def nearby_from_request(request, points):
+    """
+    Shared by the collector and admin proximity endpoints.
+    ?lat=&lng= with ?radius= (metres) or ?k= (nearest k); returns (data, error).
+    """
+    try:
+        lat = float(request.GET["lat"])
+        lng = float(request.GET["lng"])
+        radius = float(request.GET.get("radius", NEARBY_DEFAULT_RADIUS_M))
+        k = int(request.GET["k"]) if request.GET.get("k") else None
+    except (KeyError, ValueError):
+        return None, "Provide numeric lat, lng and optional radius or k."
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius <= 0 or radius > MAX_SEARCH_RADIUS_M:
+        return None, "Coordinates or radius out of range."
+
+    if k:
+        found = nearest_profiles(lat, lng, min(k, NEARBY_MAX_RESULTS), queryset=points)
+    else:
+        found = profiles_within(lat, lng, radius, queryset=points, limit=NEARBY_MAX_RESULTS)
+
+    profiles = CustomerWasteInfo.objects.select_related("user").in_bulk([pk for pk, _ in found])
+    data = []
+    for pk, distance in found:
+        info = profiles.get(pk)
+        if info is None:
+            continue
+        data.append({
+            "id": info.id,
+            "full_name": info.full_name,
+            "contact_number": info.user.contact_number if info.user else "",
+            "pickup_address": info.pickup_address,
+            "ward": info.ward,
+            "latitude": float(info.latitude),
+            "longitude": float(info.longitude),
+            "distance_m": round(distance, 1),
+        })
+    return data, None
+
+
+def sync_profile(waste_info):
+    """Create, move or drop the geo point for a profile after its coordinates change."""
+    if waste_info.latitude is None or waste_info.longitude is None:
+        CustomerGeoPoint.objects.filter(waste_info=waste_info).delete()
+        return
+    lat, lng = float(waste_info.latitude), float(waste_info.longitude)
+    CustomerGeoPoint.objects.update_or_create(
+        waste_info=waste_info,
+        defaults={"geohash": geohash_encode(lat, lng), "latitude": lat, "longitude": lng},
+    )
+
+
+def rebuild_geo_points(batch_size=2000):
+    """Recompute every geo point with bulk inserts. Returns the number written."""
+    CustomerGeoPoint.objects.all().delete()
+    profiles = CustomerWasteInfo.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).values_list("id", "latitude", "longitude").iterator(chunk_size=batch_size)
+    written = 0
+    batch = []
+    for pk, lat, lng in profiles:
+        lat, lng = float(lat), float(lng)
+        batch.append(CustomerGeoPoint(
+            waste_info_id=pk, geohash=geohash_encode(lat, lng), latitude=lat, longitude=lng,
+        ))
+        if len(batch) >= batch_size:
+            CustomerGeoPoint.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    CustomerGeoPoint.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+def _profile_saved(sender, instance, **kwargs):
+    sync_profile(instance)
+
+
+def connect_signals():
+    post_save.connect(_profile_saved, sender=CustomerWasteInfo, dispatch_uid="waste_collector_geo_sync")
@@ -0,0 +1,196 @@
+import csv
+import io
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import groupby
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from .models import InvoiceChunk, InvoiceRun, WasteCollection
+from .rollups import month_range
+
+
+# Defaults to MEDIA_ROOT/invoices; never a path relative to the working directory
+INVOICE_ROOT = getattr(settings, 'INVOICE_ROOT', None) or (
+    os.path.join(settings.MEDIA_ROOT, 'invoices') if settings.MEDIA_ROOT else None
+)
+INVOICE_CHUNK_SIZE = getattr(settings, 'INVOICE_CHUNK_SIZE', 2000)
+INVOICE_WORKERS = getattr(settings, 'INVOICE_WORKERS', os.cpu_count() or 2)
+
+SUMMARY_HEADER = ['invoice_number', 'customer_id', 'username', 'collections', 'total_kg', 'total_amount']
+
+
+def _collections(run):
+    start, end = month_range(run.month)
+    rows = WasteCollection.objects.filter(created_at__date__range=(start, end))
+    if run.localbodies:
+        rows = rows.filter(localbody_id__in=[int(pk) for pk in run.localbodies.split(',')])
+    return rows
+
+
+def run_directory(run):
+    if not INVOICE_ROOT or not os.path.isabs(INVOICE_ROOT):
+        raise ImproperlyConfigured("Set INVOICE_ROOT (or MEDIA_ROOT) to an absolute path to write invoices.")
+    return os.path.join(INVOICE_ROOT, f"{run.month:%Y-%m}", str(run.pk))
+
+
+def plan_run(month, localbody_ids=None, chunk_size=INVOICE_CHUNK_SIZE, replan=False):
+    """
+    Get or create the run for a month (any day in it) and local bodies, and split its
+    customers into id-range chunks. An existing run keeps its chunks so it can resume;
+    replan=True throws them and the files written so far away and starts over, e.g.
+    to pick up collections added after a finished run.
+    """
+    month = month.replace(day=1)
+    key = ','.join(str(pk) for pk in sorted(set(localbody_ids or ())))
+    run, created = InvoiceRun.objects.get_or_create(month=month, localbodies=key)
+    if not created and replan:
+        with transaction.atomic():
+            run.chunks.all().delete()
+            InvoiceRun.objects.filter(pk=run.pk).update(
+                status='planned', total_customers=0, done_customers=0, finished_at=None, error='',
+            )
+        shutil.rmtree(run_directory(run), ignore_errors=True)
+        run.refresh_from_db()
+    elif not created and run.chunks.exists():
+        return run
+
+    customer_ids = (
+        _collections(run).order_by('customer_id').values_list('customer_id', flat=True).distinct()
+    )
+    chunks = []
+    batch = []
+    for customer_id in customer_ids.iterator(chunk_size=10000):
+        batch.append(customer_id)
+        if len(batch) == chunk_size:
+            chunks.append(batch)
+            batch = []
+    if batch:
+        chunks.append(batch)
+
+    # All chunks or none, so a run interrupted while planning is planned again
+    with transaction.atomic():
+        InvoiceChunk.objects.bulk_create([
+            InvoiceChunk(run=run, index=i, first_customer_id=ids[0], last_customer_id=ids[-1], customers=len(ids))
+            for i, ids in enumerate(chunks)
+        ])
+        run.total_customers = sum(len(ids) for ids in chunks)
+        run.save(update_fields=['total_customers'])
+    return run
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8', newline='') as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def render_chunk(chunk_id):
+    """
+    Render one chunk: an HTML invoice per customer and a CSV part for the run summary.
+    Runs in a worker process. Files are written under temporary names and renamed, and
+    the chunk is only marked done at the end, so a crashed chunk is simply redone.
+    Returns the number of invoices written.
+    """
+    chunk = InvoiceChunk.objects.select_related('run').get(pk=chunk_id)
+    run = chunk.run
+    directory = run_directory(run)
+    os.makedirs(os.path.join(directory, 'invoices'), exist_ok=True)
+    os.makedirs(os.path.join(directory, 'parts'), exist_ok=True)
+
+    rows = _collections(run).filter(
+        customer_id__gte=chunk.first_customer_id, customer_id__lte=chunk.last_customer_id,
+    ).order_by('customer_id', 'created_at', 'id').values(
+        'customer_id', 'created_at', 'ward', 'kg', 'rate_per_kg', 'total_amount',
+        localbody_name=F('localbody__name'),
+    )
+    customers = CustomUser.objects.filter(
+        id__gte=chunk.first_customer_id, id__lte=chunk.last_customer_id,
+    ).in_bulk()
+
+    summary = []
+    written = 0
+    for customer_id, lines in groupby(rows.iterator(chunk_size=5000), key=lambda r: r['customer_id']):
+        lines = list(lines)
+        customer = customers.get(customer_id)
+        number = f"INV-{run.month:%Y%m}-{customer_id}"
+        total_kg = sum(line['kg'] for line in lines)
+        total_amount = sum(line['total_amount'] or 0 for line in lines)
+        html = render_to_string('invoice.html', {
+            'invoice_number': number,
+            'customer': customer,
+            'month': run.month,
+            'lines': lines,
+            'total_kg': total_kg,
+            'total_amount': total_amount,
+            'issued_on': timezone.localdate(),
+        })
+        _write_atomic(os.path.join(directory, 'invoices', f"{number}.html"), html)
+        summary.append([
+            number, customer_id, customer.username if customer else '',
+            len(lines), total_kg, total_amount,
+        ])
+        written += 1
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(summary)
+    _write_atomic(os.path.join(directory, 'parts', f"{chunk.index:06d}.csv"), buffer.getvalue())
+
+    with transaction.atomic():
+        InvoiceChunk.objects.filter(pk=chunk.pk).update(done=True, completed_at=timezone.now())
+        InvoiceRun.objects.filter(pk=run.pk).update(done_customers=F('done_customers') + chunk.customers)
+    return written
+
+
+def _merge_summary(run):
+    """Concatenate the chunk CSV parts, in chunk order, into summary.csv."""
+    directory = run_directory(run)
+    path = os.path.join(directory, 'summary.csv')
+    with open(f"{path}.tmp", 'w', encoding='utf-8', newline='') as out:
+        csv.writer(out).writerow(SUMMARY_HEADER)
+        for index in run.chunks.order_by('index').values_list('index', flat=True):
+            with open(os.path.join(directory, 'parts', f"{index:06d}.csv"), encoding='utf-8') as part:
+                for line in part:
+                    out.write(line)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def execute_run(run, workers=INVOICE_WORKERS, progress=None):
+    """
+    Render every chunk not yet done across a process pool, then merge the summary.
+    progress(done_chunks, total_chunks) is called as chunks finish.
+    Returns the summary CSV path.
+    """
+    pending = list(run.chunks.filter(done=False).order_by('index').values_list('pk', flat=True))
+    total = run.chunks.count()
+    InvoiceRun.objects.filter(pk=run.pk).update(status='running', error='')
+
+    try:
+        if pending:
+            # Workers are forked: they must open their own connections, not share ours
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render_chunk, chunk_id) for chunk_id in pending]
+                finished = total - len(pending)
+                for future in as_completed(futures):
+                    future.result()
+                    finished += 1
+                    if progress:
+                        progress(finished, total)
+
+        path = _merge_summary(run)
+    except BaseException as exc:
+        # Chunks finished so far stay done; running the command again resumes
+        InvoiceRun.objects.filter(pk=run.pk).update(status='failed', error=repr(exc)[:10000])
+        raise
+    InvoiceRun.objects.filter(pk=run.pk).update(status='done', finished_at=timezone.now())
+    return path
@@ -1,23 +1,214 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from authentication.models import CustomUser
-from decimal import Decimal
+from customer_dashboard.models import CustomerWasteInfo
+from super_admin_dashboard.models import LocalBody, LocalBodyCalendar
+from .storage import photo_storage
 class WasteCollection(models.Model):
     collector = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='collections')
     customer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='waste_collected')
-    localbody = models.CharField(max_length=100)
+    localbody = models.ForeignKey(LocalBody, on_delete=models.PROTECT, null=True, related_name='waste_collections')
 
     ward = models.CharField(max_length=50)
     location = models.CharField(max_length=200)
     building_no = models.CharField(max_length=50)
     street_name = models.CharField(max_length=100)
     kg = models.DecimalField(max_digits=6, decimal_places=2)
+    # Rate that priced total_amount, as effective on the collection date
+    rate_per_kg = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
-    photo = models.ImageField(upload_to='collection_photos/', blank=True, null=True)
+    photo = models.ImageField(upload_to='collection_photos/', storage=photo_storage, blank=True, null=True)
+    photo_thumbnail = models.ImageField(upload_to='collection_photos/thumbs/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Idempotency key generated by the collector app for offline submissions
+    client_key = models.CharField(max_length=64, blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['collector', 'client_key'], name='waste_collection_unique_client_key'),
+        ]
 
     def save(self, *args, **kwargs):
-        self.total_amount = self.kg *  Decimal('50.00')
-        super().save(*args, **kwargs)
+        # Imported here: the rate table needs the app registry to be ready
+        from .rates import get_rate_per_kg
+        from .rollups import record_saved, snapshot
+        from .stats import invalidate_collector_stats
+        on = timezone.localdate(self.created_at) if self.created_at else timezone.localdate()
+        self.rate_per_kg = get_rate_per_kg(self.localbody_id, on)
+        self.total_amount = self.kg * self.rate_per_kg
+        with transaction.atomic():
+            previous = snapshot(self)
+            super().save(*args, **kwargs)
+            record_saved(self, previous)
+            # A reassigned collection changes the figures of both collectors
+            collector_ids = {self.collector_id}
+            if previous is not None:
+                collector_ids.add(previous[0]['collector_id'])
+            transaction.on_commit(lambda: invalidate_collector_stats(*collector_ids))
+
+    def delete(self, *args, **kwargs):
+        from .rollups import record_deleted, snapshot
+        from .stats import invalidate_collector_stats
+        with transaction.atomic():
+            previous = snapshot(self)
+            collector_id = self.collector_id
+            result = super().delete(*args, **kwargs)
+            record_deleted(previous)
+            transaction.on_commit(lambda: invalidate_collector_stats(collector_id))
+        return result
+
+    @property
+    def thumbnail_url(self):
+        """Small version of the photo for listings; the full photo stays at photo.url."""
+        from .photos import thumbnail_url
+        return thumbnail_url(self)
 
     def __str__(self):
         return f"Waste collected by {self.collector.username} from {self.customer.username}"
+
+
+class LocalBodyRate(models.Model):
+    """A local body's rate per kg from effective_from until the next version takes over."""
+    localbody = models.ForeignKey(LocalBody, on_delete=models.CASCADE, related_name='rate_versions')
+    rate_per_kg = models.DecimalField(max_digits=8, decimal_places=2)
+    effective_from = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('localbody', 'effective_from')
+        ordering = ['localbody', 'effective_from']
+
+    def __str__(self):
+        return f"{self.localbody_id}: {self.rate_per_kg}/kg from {self.effective_from}"
+
+
+class DailyCollectionSummary(models.Model):
+    """Per day / local body / ward / collector totals, kept in step with WasteCollection."""
+    date = models.DateField()
+    localbody = models.ForeignKey(LocalBody, on_delete=models.CASCADE, null=True, related_name='+')
+    ward = models.CharField(max_length=50)
+    collector = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='daily_summaries')
+    total_kg = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    collection_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # NULLs never compare equal, so rows without a local body need their own constraint
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'localbody', 'ward', 'collector'],
+                condition=models.Q(localbody__isnull=False),
+                name='daily_summary_unique_key',
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'ward', 'collector'],
+                condition=models.Q(localbody__isnull=True),
+                name='daily_summary_unique_key_no_localbody',
+            ),
+        ]
+        indexes = [models.Index(fields=['date', 'localbody'], name='daily_summary_date_lb_idx')]
+
+    def __str__(self):
+        return f"{self.date} {self.localbody_id}/{self.ward}: {self.total_kg} kg"
+
+
+class CustomerGeoPoint(models.Model):
+    """Geohash-indexed copy of a waste profile's coordinates for proximity lookups."""
+    waste_info = models.OneToOneField(CustomerWasteInfo, on_delete=models.CASCADE, related_name='geo_point')
+    geohash = models.CharField(max_length=12, db_index=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return f"{self.waste_info_id} @ {self.geohash}"
+
+
+class PickupSlot(models.Model):
+    """Booking capacity for a calendar date; ward='' covers the whole local body."""
+    calendar = models.ForeignKey(LocalBodyCalendar, on_delete=models.CASCADE, related_name='slots')
+    ward = models.CharField(max_length=50, blank=True, default='')
+    capacity = models.PositiveIntegerField()
+    booked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('calendar', 'ward')
+        constraints = [
+            models.CheckConstraint(check=models.Q(booked__lte=models.F('capacity')), name='pickup_slot_not_overbooked'),
+        ]
+
+    @property
+    def remaining(self):
+        return max(self.capacity - self.booked, 0)
+
+    def __str__(self):
+        return f"{self.calendar} {self.ward or 'all wards'}: {self.booked}/{self.capacity}"
+
+
+class CollectorAssignmentChange(models.Model):
+    """One profile's collector change made by a bulk assignment run."""
+    batch = models.UUIDField(db_index=True)
+    waste_info = models.ForeignKey(CustomerWasteInfo, on_delete=models.CASCADE, related_name='assignment_changes')
+    previous_collector = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    new_collector = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='+')
+    changed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.waste_info_id}: {self.previous_collector_id} -> {self.new_collector_id}"
+
+
+class CollectorPing(models.Model):
+    """One GPS fix reported by a collector's app; old tracks are thinned by compact_collector_tracks."""
+    id = models.BigAutoField(primary_key=True)
+    collector = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='pings', db_index=False)
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    accuracy = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['collector', 'recorded_at'], name='collector_ping_track_idx')]
+
+    def __str__(self):
+        return f"{self.collector_id} @ {self.latitude},{self.longitude} ({self.recorded_at})"
+
+
+class InvoiceRun(models.Model):
+    """One monthly invoicing run; re-running the same month and local bodies resumes it."""
+    STATUS_CHOICES = [('planned', 'Planned'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')]
+
+    month = models.DateField()
+    # Sorted, comma-separated local body ids; '' means every local body
+    localbodies = models.CharField(max_length=1000, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='planned')
+    total_customers = models.PositiveIntegerField(default=0)
+    done_customers = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Why the last execution stopped, when status is 'failed'
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('month', 'localbodies')
+
+    def __str__(self):
+        return f"Invoices {self.month:%Y-%m} [{self.localbodies or 'all'}]: {self.done_customers}/{self.total_customers}"
+
+
+class InvoiceChunk(models.Model):
+    """A contiguous customer id range of an invoice run, rendered by one worker task."""
+    run = models.ForeignKey(InvoiceRun, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    first_customer_id = models.IntegerField()
+    last_customer_id = models.IntegerField()
+    customers = models.PositiveIntegerField()
+    done = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('run', 'index')
+
+    def __str__(self):
+        return f"{self.run_id}#{self.index}: {self.first_customer_id}-{self.last_customer_id}"
@@ -0,0 +1,258 @@
+import io
+import logging
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import WasteCollection
+from .storage import digest_from_name, photo_storage, shard_path
+
+logger = logging.getLogger(__name__)
+
+
+# Upload limits and output sizes (overridable from settings)
+MAX_PHOTO_BYTES = getattr(settings, 'WASTE_PHOTO_MAX_BYTES', 8 * 1024 * 1024)
+MAX_PHOTO_PIXELS = getattr(settings, 'WASTE_PHOTO_MAX_PIXELS', 40_000_000)
+PHOTO_MAX_DIMENSION = getattr(settings, 'WASTE_PHOTO_MAX_DIMENSION', 1600)
+THUMBNAIL_SIZE = getattr(settings, 'WASTE_PHOTO_THUMBNAIL_SIZE', (320, 320))
+JPEG_QUALITY = getattr(settings, 'WASTE_PHOTO_JPEG_QUALITY', 80)
+PHOTO_WORKERS = getattr(settings, 'WASTE_PHOTO_WORKERS', 2)
+
+STAGING_DIR = 'collection_photos/incoming/'
+THUMBNAIL_DIR = 'collection_photos/thumbs/'
+CHUNK_SIZE = 64 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=PHOTO_WORKERS, thread_name_prefix='waste-photo')
+
+
+class PhotoUploadError(Exception):
+    """Raised when an uploaded photo is missing, too large or not an image."""
+
+
+def _staging_name():
+    return f"{STAGING_DIR}{uuid.uuid4().hex}"
+
+
+def stage_uploaded_file(uploaded_file):
+    """
+    Store a multipart upload (already spooled to disk by Django's upload handlers)
+    in the staging area and return its storage name.
+    """
+    if uploaded_file.size > MAX_PHOTO_BYTES:
+        raise PhotoUploadError("Photo is too large.")
+    if uploaded_file.content_type and not uploaded_file.content_type.startswith('image/'):
+        raise PhotoUploadError("Uploaded file is not an image.")
+    return photo_storage.save_as(_staging_name(), uploaded_file)
+
+
+def stage_request_body(request):
+    """
+    Stream a raw image/* request body into the staging area in fixed-size chunks,
+    aborting as soon as the size cap is exceeded. Returns the storage name.
+    """
+    content_type = request.META.get('CONTENT_TYPE', '')
+    if not content_type.startswith('image/'):
+        raise PhotoUploadError("Send the photo as image/* or multipart form data.")
+    try:
+        declared = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        declared = 0
+    if declared > MAX_PHOTO_BYTES:
+        raise PhotoUploadError("Photo is too large.")
+
+    received = 0
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as tmp:
+        while True:
+            chunk = request.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            if received > MAX_PHOTO_BYTES:
+                raise PhotoUploadError("Photo is too large.")
+            tmp.write(chunk)
+        if not received:
+            raise PhotoUploadError("Empty upload.")
+        tmp.seek(0)
+        return photo_storage.save_as(_staging_name(), File(tmp))
+
+
+def is_staged(name):
+    """Check that an upload id refers to a file in the staging area."""
+    return (
+        bool(name)
+        and name.startswith(STAGING_DIR)
+        and '..' not in name
+        and photo_storage.exists(name)
+    )
+
+
+def _encode_jpeg(image, size):
+    copy = image.copy()
+    copy.thumbnail(size)
+    buf = io.BytesIO()
+    copy.save(buf, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return ContentFile(buf.getvalue())
+
+
+def _decode(staged_name):
+    """Open a staged upload as an upright RGB image; PhotoUploadError when it cannot be used."""
+    with photo_storage.open(staged_name, 'rb') as fh:
+        try:
+            image = Image.open(fh)
+            if image.width * image.height > MAX_PHOTO_PIXELS:
+                raise PhotoUploadError("Photo has too many pixels.")
+            # Let the JPEG decoder downscale while reading when it can
+            image.draft('RGB', (PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION))
+            return ImageOps.exif_transpose(image).convert('RGB')
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as exc:
+            # Not an image, or a truncated/corrupt one: retrying gives the same result
+            raise PhotoUploadError(str(exc)) from exc
+
+
+def process_photo(collection_id, staged_name):
+    """
+    Recompress a staged photo, generate its thumbnail and point the collection at
+    the processed files. Runs on the worker pool, never on the request thread.
+    A photo that can never be processed is dropped; other failures keep the staged
+    original so process_pending retries it.
+    """
+    close_old_connections()
+    try:
+        image = _decode(staged_name)
+        # Stored under its content hash, so a re-submitted photo reuses the same file;
+        # the thumbnail is made on first request (see ensure_thumbnail)
+        photo_name = photo_storage.save(
+            'photo.jpg', _encode_jpeg(image, (PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION)),
+        )
+        # Only if still staged: the sweep below and the pool may both pick a photo up
+        WasteCollection.objects.filter(pk=collection_id, photo=staged_name).update(photo=photo_name)
+        photo_storage.delete(staged_name)
+    except (PhotoUploadError, FileNotFoundError) as exc:
+        logger.warning("Dropping unusable photo %s for collection %s: %s", staged_name, collection_id, exc)
+        WasteCollection.objects.filter(pk=collection_id, photo=staged_name).update(photo=None)
+        photo_storage.delete(staged_name)
+    except Exception:
+        # Transient (storage, database): keep the staged original attached for the next sweep
+        logger.exception("Processing photo %s for collection %s failed", staged_name, collection_id)
+    finally:
+        connection.close()
+
+
+def thumbnail_name(digest):
+    width, height = THUMBNAIL_SIZE
+    return shard_path(f"{THUMBNAIL_DIR}{width}x{height}/", digest, '.jpg')
+
+
+def ensure_thumbnail(digest):
+    """
+    Storage name of the thumbnail for the content-addressed photo with this digest,
+    generating it on first use. Returns None when there is no such photo.
+    """
+    name = thumbnail_name(digest)
+    if photo_storage.exists(name):
+        return name
+    original = shard_path(photo_storage.prefix, digest, '.jpg')
+    if not photo_storage.exists(original):
+        return None
+    with photo_storage.open(original, 'rb') as fh:
+        image = Image.open(fh)
+        image.draft('RGB', THUMBNAIL_SIZE)
+        thumb = _encode_jpeg(image.convert('RGB'), THUMBNAIL_SIZE)
+    # A concurrent request may write it too; its copy is identical and replaces ours
+    return photo_storage.save_as(name, thumb)
+
+
+def thumbnail_url(collection):
+    """URL for a collection's thumbnail: the cached generator for hashed photos, else the stored file."""
+    digest = digest_from_name(collection.photo.name) if collection.photo else None
+    if digest:
+        return reverse('waste_collector:collection_photo_thumbnail', args=[digest])
+    if collection.photo_thumbnail:
+        return collection.photo_thumbnail.url
+    return collection.photo.url if collection.photo else None
+
+
+def collect_garbage(grace_seconds=86400, dry_run=False):
+    """
+    Delete photo files no collection refers to: orphaned originals, thumbnails of
+    photos that are gone and abandoned staged uploads. Files newer than grace_seconds
+    are kept so in-flight uploads survive. Returns (examined, deleted).
+    """
+    referenced = set()
+    digests = set()
+    rows = WasteCollection.objects.exclude(photo='').exclude(photo__isnull=True)
+    for photo, thumb in rows.values_list('photo', 'photo_thumbnail').iterator(chunk_size=5000):
+        referenced.add(photo)
+        if thumb:
+            referenced.add(thumb)
+        digest = digest_from_name(photo)
+        if digest:
+            digests.add(digest)
+
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    examined = deleted = 0
+    for name in _walk(photo_storage, photo_storage.prefix.rstrip('/')):
+        examined += 1
+        if name in referenced:
+            continue
+        if name.startswith(THUMBNAIL_DIR) and digest_from_name(name) in digests:
+            continue
+        try:
+            if photo_storage.get_modified_time(name) > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        # Re-check right before deleting: the list above may be minutes old, and
+        # photo_storage.save refreshes the mtime of an original it reuses
+        if WasteCollection.objects.filter(Q(photo=name) | Q(photo_thumbnail=name)).exists():
+            continue
+        if not dry_run:
+            photo_storage.delete(name)
+        deleted += 1
+    return examined, deleted
+
+
+def _walk(storage, path):
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        # Nothing has been stored there yet
+        return
+    for name in files:
+        yield f"{path}/{name}"
+    for directory in directories:
+        yield from _walk(storage, f"{path}/{directory}")
+
+
+def process_pending(min_age_seconds=600):
+    """
+    Process, on the calling thread, collections whose photo is still a staged upload
+    older than min_age_seconds: jobs lost when a worker process exited with work
+    still queued. Returns the number of collections processed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=min_age_seconds)
+    pending = list(
+        WasteCollection.objects.filter(photo__startswith=STAGING_DIR, created_at__lt=cutoff)
+        .order_by('id').values_list('id', 'photo')
+    )
+    for collection_id, staged_name in pending:
+        process_photo(collection_id, staged_name)
+    return len(pending)
+
+
+def schedule_processing(collection_id, staged_name):
+    """Queue processing once the surrounding transaction (if any) has committed."""
+    transaction.on_commit(
+        lambda: _executor.submit(process_photo, collection_id, staged_name)
+    )
+
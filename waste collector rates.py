@@ -0,0 +1,154 @@
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from super_admin_dashboard.models import LocalBody
+from .models import LocalBodyRate, WasteCollection
+
+
+DEFAULT_RATE_PER_KG = Decimal('50.00')
+
+# Upper bound on how stale another worker process's table can get
+RATE_CACHE_TTL = getattr(settings, 'WASTE_RATE_CACHE_TTL', 300)
+
+_lock = threading.Lock()
+_rates = None
+_base = None
+_versions = None
+_loaded_at = 0.0
+
+
+def _load_base_rates():
+    """One LEFT JOIN over local bodies and their (unversioned) rate rows."""
+    rates = {}
+    for localbody_id, rate in LocalBody.objects.values_list('id', 'rate_info__rate_per_kg'):
+        rates[localbody_id] = rate if rate is not None else DEFAULT_RATE_PER_KG
+    return rates
+
+
+def _load_versions():
+    """{localbody_id: ([effective_from, ...], [rate, ...])}, dates ascending."""
+    versions = {}
+    rows = LocalBodyRate.objects.order_by('localbody_id', 'effective_from').values_list(
+        'localbody_id', 'effective_from', 'rate_per_kg'
+    )
+    for localbody_id, effective_from, rate in rows:
+        dates, rates = versions.setdefault(localbody_id, ([], []))
+        dates.append(effective_from)
+        rates.append(rate)
+    return versions
+
+
+def _versioned(base, versions, localbody_id, on):
+    entry = versions.get(localbody_id)
+    if entry:
+        i = bisect_right(entry[0], on)
+        if i:
+            return entry[1][i - 1]
+    return base.get(localbody_id, DEFAULT_RATE_PER_KG)
+
+
+def _tables():
+    global _rates, _base, _versions, _loaded_at
+    with _lock:
+        if _rates is None or time.monotonic() - _loaded_at > RATE_CACHE_TTL:
+            _base = _load_base_rates()
+            _versions = _load_versions()
+            today = timezone.localdate()
+            _rates = {lb: _versioned(_base, _versions, lb, today) for lb in _base}
+            _loaded_at = time.monotonic()
+        return _rates, _base, _versions
+
+
+def get_rate_table():
+    """Return {localbody_id: rate_per_kg in effect today}, loading it at most once per TTL."""
+    return _tables()[0]
+
+
+def get_rate_per_kg(localbody_id, on=None):
+    """
+    Rate for a local body id (int or numeric string) on a date (default today):
+    the latest version effective by then, else the local body's base rate, else the default.
+    """
+    try:
+        localbody_id = int(localbody_id)
+    except (TypeError, ValueError):
+        return DEFAULT_RATE_PER_KG
+    rates, base, versions = _tables()
+    if on is None:
+        return rates.get(localbody_id, DEFAULT_RATE_PER_KG)
+    return _versioned(base, versions, localbody_id, on)
+
+
+def rate_windows(localbody_id, start=None, end=None):
+    """
+    [(window_start, window_end_exclusive_or_None, rate)] for the versions of one
+    local body that overlap start..end (inclusive dates, open-ended when None).
+    """
+    rows = list(
+        LocalBodyRate.objects.filter(localbody_id=localbody_id)
+        .order_by('effective_from').values_list('effective_from', 'rate_per_kg')
+    )
+    windows = []
+    for i, (effective_from, rate) in enumerate(rows):
+        window_end = rows[i + 1][0] if i + 1 < len(rows) else None
+        if end is not None and effective_from > end:
+            break
+        if start is not None and window_end is not None and window_end <= start:
+            continue
+        windows.append((effective_from, window_end, rate))
+    return windows
+
+
+def reprice(localbody_id, start=None, end=None):
+    """
+    Reprice a local body's collections in start..end (inclusive dates) from its rate
+    versions with one UPDATE per rate window, then rebuild that local body's daily
+    summaries for the repriced days (which also drops the affected collectors'
+    cached stats). Returns the number of collections updated.
+    """
+    from .rollups import rebuild
+
+    windows = rate_windows(localbody_id, start, end)
+    if not windows:
+        return 0
+    updated = 0
+    with transaction.atomic():
+        for window_start, window_end, rate in windows:
+            rows = WasteCollection.objects.filter(
+                localbody_id=localbody_id,
+                created_at__date__gte=max(window_start, start) if start else window_start,
+            )
+            if window_end is not None:
+                rows = rows.filter(created_at__date__lt=window_end)
+            if end is not None:
+                rows = rows.filter(created_at__date__lte=end)
+            updated += rows.update(
+                rate_per_kg=rate,
+                total_amount=ExpressionWrapper(
+                    F('kg') * Value(rate), output_field=DecimalField(max_digits=10, decimal_places=2)
+                ),
+            )
+        first = max(windows[0][0], start) if start else windows[0][0]
+        rebuild(first, end, localbody_id=localbody_id)
+    return updated
+
+
+def invalidate_rates(**kwargs):
+    global _rates
+    with _lock:
+        _rates = None
+
+
+def connect_signals():
+    rate_model = LocalBody._meta.get_field('rate_info').related_model
+    for sender in (LocalBody, rate_model, LocalBodyRate):
+        post_save.connect(invalidate_rates, sender=sender, dispatch_uid=f'waste_rates_save_{sender.__name__}')
+        post_delete.connect(invalidate_rates, sender=sender, dispatch_uid=f'waste_rates_delete_{sender.__name__}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from waste_collector_dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the daily collection summary table from WasteCollection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD). Default: all history.")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD). Default: today.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options['start']:
+            start = parse_date(options['start'])
+            if not start:
+                raise CommandError("Invalid --start date")
+        if options['end']:
+            end = parse_date(options['end'])
+            if not end:
+                raise CommandError("Invalid --end date")
+
+        written = rebuild(start, end, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily summary rows."))
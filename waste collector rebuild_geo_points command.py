@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from waste_collector_dashboard.geo import rebuild_geo_points
+
+
+class Command(BaseCommand):
+    help = "Backfill the geohash index (CustomerGeoPoint) from waste profile coordinates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = rebuild_geo_points(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} waste profile locations."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from waste_collector_dashboard.rates import reprice
+
+
+class Command(BaseCommand):
+    help = "Reprice a local body's collections from its effective-dated rate versions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('localbody', type=int, nargs='+', help="Local body ids to reprice.")
+        parser.add_argument('--start', help="First collection day (YYYY-MM-DD). Default: first rate version.")
+        parser.add_argument('--end', help="Last collection day (YYYY-MM-DD). Default: open-ended.")
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options['start']:
+            start = parse_date(options['start'])
+            if not start:
+                raise CommandError("Invalid --start date")
+        if options['end']:
+            end = parse_date(options['end'])
+            if not end:
+                raise CommandError("Invalid --end date")
+
+        for localbody_id in options['localbody']:
+            updated = reprice(localbody_id, start, end)
+            self.stdout.write(self.style.SUCCESS(f"Local body {localbody_id}: repriced {updated} collections."))
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCollectionSummary, WasteCollection
+
+
+def rollup_key(collection):
+    """The summary row a collection counts towards."""
+    return {
+        'date': timezone.localdate(collection.created_at),
+        'localbody_id': collection.localbody_id,
+        'ward': collection.ward,
+        'collector_id': collection.collector_id,
+    }
+
+
+def apply_delta(key, kg, revenue, count):
+    """Add (or with negative values, remove) totals on one summary row."""
+    if not count and not kg and not revenue:
+        return
+    changes = {
+        'total_kg': F('total_kg') + kg,
+        'total_revenue': F('total_revenue') + revenue,
+        'collection_count': F('collection_count') + count,
+    }
+    if DailyCollectionSummary.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyCollectionSummary.objects.create(
+                total_kg=kg, total_revenue=revenue, collection_count=count, **key
+            )
+    except IntegrityError:
+        # Another request created the row first
+        DailyCollectionSummary.objects.filter(**key).update(**changes)
+
+
+def snapshot(collection):
+    """
+    Key and totals of a collection as currently stored, or None for a new row.
+    Call inside the transaction that saves or deletes it: the row stays locked
+    until then, so a concurrent edit cannot move the same totals twice.
+    """
+    if not collection.pk:
+        return None
+    stored = WasteCollection.objects.select_for_update().filter(pk=collection.pk).only(
+        'created_at', 'localbody_id', 'ward', 'collector_id', 'kg', 'total_amount'
+    ).first()
+    if stored is None:
+        return None
+    return rollup_key(stored), stored.kg, stored.total_amount or Decimal('0')
+
+
+def record_saved(collection, previous):
+    """Move a saved collection's totals from its previous summary row to its current one."""
+    if previous is not None:
+        key, kg, revenue = previous
+        apply_delta(key, -kg, -revenue, -1)
+    apply_delta(rollup_key(collection), collection.kg, collection.total_amount or Decimal('0'), 1)
+
+
+def record_created(collections):
+    """Add many newly inserted collections (e.g. from bulk_create) with one delta per summary row."""
+    deltas = {}
+    for collection in collections:
+        key = tuple(sorted(rollup_key(collection).items()))
+        kg, revenue, count = deltas.get(key, (0, Decimal('0'), 0))
+        deltas[key] = (kg + collection.kg, revenue + (collection.total_amount or Decimal('0')), count + 1)
+    for key, (kg, revenue, count) in deltas.items():
+        apply_delta(dict(key), kg, revenue, count)
+
+
+def record_deleted(previous):
+    if previous is not None:
+        key, kg, revenue = previous
+        apply_delta(key, -kg, -revenue, -1)
+
+
+def rebuild(start=None, end=None, batch_size=1000, localbody_id=None):
+    """
+    Recompute summary rows for start..end (inclusive dates; open-ended when None),
+    optionally for one local body only, straight from WasteCollection with one
+    grouped query. The cached stats of every collector with a row before or after
+    are dropped on commit. Returns the number of summary rows written.
+    """
+    from .stats import invalidate_collector_stats
+
+    collections = WasteCollection.objects.all()
+    summaries = DailyCollectionSummary.objects.all()
+    if localbody_id is not None:
+        collections = collections.filter(localbody_id=localbody_id)
+        summaries = summaries.filter(localbody_id=localbody_id)
+    if start:
+        collections = collections.filter(created_at__date__gte=start)
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        collections = collections.filter(created_at__date__lte=end)
+        summaries = summaries.filter(date__lte=end)
+
+    grouped = collections.annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'day', 'localbody_id', 'ward', 'collector_id'
+    ).annotate(
+        kg_sum=Sum('kg'), revenue_sum=Sum('total_amount'), row_count=Count('id')
+    ).order_by()
+
+    written = 0
+    with transaction.atomic():
+        collector_ids = set(summaries.order_by().values_list('collector_id', flat=True).distinct())
+        summaries.delete()
+        batch = []
+        for row in grouped.iterator(chunk_size=batch_size):
+            collector_ids.add(row['collector_id'])
+            batch.append(DailyCollectionSummary(
+                date=row['day'],
+                localbody_id=row['localbody_id'],
+                ward=row['ward'],
+                collector_id=row['collector_id'],
+                total_kg=row['kg_sum'] or 0,
+                total_revenue=row['revenue_sum'] or 0,
+                collection_count=row['row_count'],
+            ))
+            if len(batch) >= batch_size:
+                DailyCollectionSummary.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        DailyCollectionSummary.objects.bulk_create(batch)
+        written += len(batch)
+        transaction.on_commit(lambda: invalidate_collector_stats(*collector_ids))
+    return written
+
+
+def month_range(today=None):
+    """First and last day of the month containing today."""
+    today = today or timezone.localdate()
+    start = today.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
@@ -0,0 +1,95 @@
+import time
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_M
+
+
+DEFAULT_TIME_BUDGET = 0.8   # seconds for the whole solve
+_EPSILON = 1e-6
+
+
+def distance_matrix(latitudes, longitudes):
+    """Pairwise haversine distances in metres as an (n, n) array."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lng = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour(dist, start=0):
+    """Greedy tour from start: always go to the closest unvisited node."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.int64)
+    current = start
+    for k in range(n):
+        tour[k] = current
+        visited[current] = True
+        if k == n - 1:
+            break
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+    return tour
+
+
+def two_opt(dist, tour, deadline):
+    """
+    Improve an open path that keeps tour[0] fixed by reversing segments, until no
+    reversal helps or the deadline passes. For each i all j are scored at once.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:]                          # segment ends j = i+1 .. n-1
+            e = np.append(tour[i + 2:], -1)           # node after each end (-1: path end)
+            has_next = e >= 0
+            e_safe = np.where(has_next, e, 0)
+            gain = (
+                dist[a, b] - dist[a, c]
+                + np.where(has_next, dist[c, e_safe] - dist[b, e_safe], 0.0)
+            )
+            best = int(np.argmax(gain))
+            if gain[best] > _EPSILON:
+                j = i + 1 + best
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+            if i % 32 == 0 and time.perf_counter() >= deadline:
+                break
+    return tour
+
+
+def plan_route(stops, start=None, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Order stops [(key, lat, lng), ...] into a short open route.
+    start is an optional (lat, lng) the route must begin at (e.g. the collector's position);
+    without it the route may begin at any stop.
+    Returns (ordered keys, leg distances in metres).
+    """
+    if not stops:
+        return [], []
+    deadline = time.perf_counter() + time_budget
+
+    lats = [s[1] for s in stops]
+    lngs = [s[2] for s in stops]
+    if start is not None:
+        dist = distance_matrix([start[0]] + lats, [start[1]] + lngs)
+    else:
+        # Free start: a dummy depot at zero distance from every stop
+        core = distance_matrix(lats, lngs)
+        dist = np.zeros((len(stops) + 1, len(stops) + 1))
+        dist[1:, 1:] = core
+
+    tour = two_opt(dist, nearest_neighbour(dist, 0), deadline)
+
+    order = [int(node) - 1 for node in tour[1:]]
+    legs = [float(dist[tour[k - 1], tour[k]]) for k in range(1, len(tour))]
+    if start is None:
+        legs[0] = 0.0
+    return [stops[i][0] for i in order], legs
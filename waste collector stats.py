@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from customer_dashboard.models import CustomerPickupDate, CustomerWasteInfo
+from .models import DailyCollectionSummary, WasteCollection
+
+
+COLLECTOR_STATS_TIMEOUT = getattr(settings, 'COLLECTOR_STATS_TIMEOUT', 300)
+
+
+def _cache_key(collector_id):
+    return f'collector-stats:{collector_id}:{timezone.localdate().isoformat()}'
+
+
+def _compute(collector_id):
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+
+    def window(start):
+        return Q(date__gte=start)
+
+    # One aggregate over the collector's daily rollup rows
+    stats = DailyCollectionSummary.objects.filter(collector_id=collector_id).aggregate(
+        total_collections=Sum('collection_count'),
+        total_weight=Sum('total_kg'),
+        total_revenue=Sum('total_revenue'),
+        today_collections=Sum('collection_count', filter=window(today)),
+        today_weight=Sum('total_kg', filter=window(today)),
+        today_revenue=Sum('total_revenue', filter=window(today)),
+        week_collections=Sum('collection_count', filter=window(week_start)),
+        week_weight=Sum('total_kg', filter=window(week_start)),
+        week_revenue=Sum('total_revenue', filter=window(week_start)),
+        month_collections=Sum('collection_count', filter=window(month_start)),
+        month_weight=Sum('total_kg', filter=window(month_start)),
+        month_revenue=Sum('total_revenue', filter=window(month_start)),
+    )
+    stats = {k: v or 0 for k, v in stats.items()}
+
+    # Households booked for today that have not been collected from yet
+    stats['pending_pickups'] = CustomerWasteInfo.objects.filter(
+        assigned_collector_id=collector_id,
+    ).filter(
+        Exists(CustomerPickupDate.objects.filter(waste_info=OuterRef('pk'), localbody_calendar__date=today)),
+    ).exclude(
+        Exists(WasteCollection.objects.filter(
+            collector_id=collector_id, customer_id=OuterRef('user_id'), created_at__date=today,
+        )),
+    ).aggregate(n=Count('id'))['n']
+    return stats
+
+
+def collector_stats(collector_id):
+    """Dashboard figures for one collector, cached until they save a collection (or the TTL)."""
+    key = _cache_key(collector_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute(collector_id)
+        cache.set(key, stats, COLLECTOR_STATS_TIMEOUT)
+    return stats
+
+
+def invalidate_collector_stats(*collector_ids):
+    cache.delete_many([_cache_key(collector_id) for collector_id in collector_ids])
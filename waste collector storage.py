@@ -0,0 +1,73 @@
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def shard_path(prefix, digest, ext):
+    """prefix/ab/cd/abcd...ext, two levels of 256 directories each."""
+    return f"{prefix}{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def digest_from_name(name):
+    """The content hash a content-addressed name was built from, or None for other names."""
+    stem = os.path.splitext(os.path.basename(name or ''))[0]
+    return stem if DIGEST_RE.match(stem) else None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Media storage that names each file after the SHA-256 of its content, sharded
+    under prefix. Saving bytes that are already stored writes nothing and returns
+    the existing name. Other names (staged uploads, older photos) open as usual;
+    save_as() stores under an exact name (staging, thumbnails).
+    """
+
+    def __init__(self, prefix='collection_photos/', **kwargs):
+        self.prefix = prefix
+        super().__init__(**kwargs)
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        sha = hashlib.sha256()
+        for chunk in content.chunks():
+            sha.update(chunk)
+        content.seek(0)
+        ext = os.path.splitext(name or '')[1].lower() or '.jpg'
+        target = shard_path(self.prefix, sha.hexdigest(), ext)
+        if max_length is not None and len(target) > max_length:
+            raise SuspiciousFileOperation(f'Storage name "{target}" is longer than {max_length} characters.')
+        if self.exists(target):
+            try:
+                # A fresh mtime keeps collect_garbage's grace period away from a file
+                # that is being referenced again
+                os.utime(self.path(target))
+                return target
+            except FileNotFoundError:
+                pass    # collected in the meantime; write it again
+        return self.save_as(target, content)
+
+    def save_as(self, name, content):
+        """
+        Store content under exactly name, replacing whatever is there. The bytes go to
+        a private temporary name first and are renamed into place, so concurrent
+        writers of the same name never end up with suffixed copies.
+        """
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        tmp = super().save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(tmp), self.path(name))
+        return name
+
+
+photo_storage = ContentAddressedStorage()
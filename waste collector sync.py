@@ -0,0 +1,118 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .forms import WasteCollectionForm
+from .models import WasteCollection
+from .photos import is_staged, schedule_processing
+from .rates import get_rate_per_kg
+from .rollups import record_created
+from .stats import invalidate_collector_stats
+
+
+# Largest offline queue accepted in one request
+MAX_SYNC_BATCH = 200
+
+
+def _validate(item):
+    """Return (unsaved WasteCollection, None) or (None, errors) for one submitted item."""
+    if not isinstance(item, dict):
+        return None, {'__all__': ['Expected an object.']}
+    form = WasteCollectionForm(data=item)
+    if not form.is_valid():
+        return None, form.errors.get_json_data()
+    upload_id = form.cleaned_data.get('photo_upload_id')
+    if not is_staged(upload_id):
+        return None, {'photo_upload_id': [{'message': 'Uploaded photo not found, please capture it again.'}]}
+    instance = form.save(commit=False)
+    instance.photo.name = upload_id
+    return instance, None
+
+
+def _insert(collector, pending):
+    """
+    Insert the pending {client_key: instance} collections in one transaction,
+    skipping keys this collector has already synced. Returns {client_key: id} for
+    the rows inserted and for the ones that already existed.
+    """
+    with transaction.atomic():
+        existing = dict(
+            WasteCollection.objects.filter(collector=collector, client_key__in=list(pending))
+            .values_list('client_key', 'id')
+        )
+        new = [instance for key, instance in pending.items() if key not in existing]
+        today = timezone.localdate()
+        for instance in new:
+            instance.collector = collector
+            # bulk_create skips save(), so price the rows here
+            instance.rate_per_kg = get_rate_per_kg(instance.localbody_id, today)
+            instance.total_amount = instance.kg * instance.rate_per_kg
+        WasteCollection.objects.bulk_create(new)
+        # ... and keep the daily summaries in step by hand
+        record_created(new)
+
+        created = dict(
+            WasteCollection.objects.filter(
+                collector=collector, client_key__in=[i.client_key for i in new]
+            ).values_list('client_key', 'id')
+        )
+        for key, collection_id in created.items():
+            schedule_processing(collection_id, pending[key].photo.name)
+        collector_id = collector.id
+        transaction.on_commit(lambda: invalidate_collector_stats(collector_id))
+    return created, existing
+
+
+def sync_collections(collector, items):
+    """
+    Validate and store a batch of offline collections for one collector.
+    Every item needs a 'client_key'; resending a key already stored (or repeated in
+    the batch) reports it as a duplicate instead of inserting it again. An uploaded
+    photo may only be used by one item of the batch.
+    Returns one {'client_key', 'status', 'id' | 'errors'} result per item, in order;
+    status 'retry' means the batch kept conflicting with a concurrent one.
+    """
+    results = []
+    pending = {}
+    photo_keys = {}
+    for item in items:
+        key = item.get('client_key') if isinstance(item, dict) else None
+        if not isinstance(key, str) or not key or len(key) > 64:
+            results.append({'client_key': key, 'status': 'invalid',
+                            'errors': {'client_key': [{'message': 'A client_key of up to 64 characters is required.'}]}})
+            continue
+        if key in pending:
+            results.append({'client_key': key, 'status': 'duplicate'})
+            continue
+        instance, errors = _validate(item)
+        if not errors and instance.photo.name in photo_keys:
+            errors = {'photo_upload_id': [{'message': f'Photo already used by {photo_keys[instance.photo.name]}.'}]}
+        if errors:
+            results.append({'client_key': key, 'status': 'invalid', 'errors': errors})
+            continue
+        photo_keys[instance.photo.name] = key
+        instance.client_key = key
+        pending[key] = instance
+        results.append({'client_key': key, 'status': 'created'})
+
+    if pending:
+        try:
+            created, existing = _insert(collector, pending)
+        except IntegrityError:
+            # The same queue was flushed concurrently; the retry sees its rows as existing
+            try:
+                created, existing = _insert(collector, pending)
+            except IntegrityError:
+                for result in results:
+                    if result['client_key'] in pending and result['status'] in ('created', 'duplicate'):
+                        result.update(status='retry', errors={'__all__': [{'message': 'Sync conflict, please retry.'}]})
+                return results
+
+        for result in results:
+            key = result['client_key']
+            if key in existing:
+                result.update(status='duplicate', id=existing[key])
+            elif key in created and result['status'] == 'created':
+                result['id'] = created[key]
+            elif result['status'] == 'duplicate' and key in pending:
+                result['id'] = created.get(key, existing.get(key))
+    return results
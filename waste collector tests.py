@@ -0,0 +1,147 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from authentication.models import CustomUser
+from super_admin_dashboard.models import District, LocalBody, State
+from .models import DailyCollectionSummary, LocalBodyRate, WasteCollection
+from .photos import STAGING_DIR
+from .rates import get_rate_per_kg, invalidate_rates
+from .rollups import rebuild
+from .storage import photo_storage
+from .sync import sync_collections
+
+
+def _localbody():
+    state = State.objects.create(name='Kerala')
+    district = District.objects.create(state=state, name='Thrissur')
+    return LocalBody.objects.create(district=district, name='Thrissur Corporation')
+
+
+class RateVersionTests(TestCase):
+    """A collection is priced with the rate version in effect on its date."""
+
+    def setUp(self):
+        invalidate_rates()
+        self.localbody = _localbody()
+        LocalBodyRate.objects.create(localbody=self.localbody, rate_per_kg=Decimal('40.00'), effective_from=date(2026, 1, 1))
+        LocalBodyRate.objects.create(localbody=self.localbody, rate_per_kg=Decimal('45.00'), effective_from=date(2026, 6, 1))
+
+    def test_picks_the_version_effective_on_the_date(self):
+        self.assertEqual(get_rate_per_kg(self.localbody.id, date(2026, 3, 1)), Decimal('40.00'))
+        self.assertEqual(get_rate_per_kg(self.localbody.id, date(2026, 6, 1)), Decimal('45.00'))
+        self.assertEqual(get_rate_per_kg(str(self.localbody.id), date(2027, 1, 1)), Decimal('45.00'))
+
+    def test_new_version_is_seen_without_waiting_for_the_ttl(self):
+        get_rate_per_kg(self.localbody.id, date(2026, 9, 1))
+        LocalBodyRate.objects.create(localbody=self.localbody, rate_per_kg=Decimal('50.00'), effective_from=date(2026, 9, 1))
+
+        self.assertEqual(get_rate_per_kg(self.localbody.id, date(2026, 9, 1)), Decimal('50.00'))
+
+
+class RollupTests(TestCase):
+    """The daily summaries kept up incrementally match a rebuild from scratch."""
+
+    def setUp(self):
+        invalidate_rates()
+        self.localbody = _localbody()
+        self.collectors = [
+            CustomUser.objects.create_user(username=f'collector{i}', password='x', role=1) for i in range(2)
+        ]
+        self.customer = CustomUser.objects.create_user(username='customer', password='x', role=0)
+
+    def _collect(self, collector, kg):
+        return WasteCollection.objects.create(
+            collector=collector, customer=self.customer, localbody=self.localbody, ward='3',
+            location='Market', building_no='12', street_name='MG Road', kg=Decimal(kg),
+        )
+
+    def _totals(self):
+        return sorted(
+            DailyCollectionSummary.objects.filter(collection_count__gt=0)
+            .values_list('collector_id', 'collection_count', 'total_kg', 'total_revenue')
+        )
+
+    def test_reassigning_a_collection_moves_its_totals(self):
+        collection = self._collect(self.collectors[0], '4.00')
+        collection.collector = self.collectors[1]
+        collection.save()
+
+        totals = self._totals()
+        self.assertEqual([(c, n, kg) for c, n, kg, _ in totals], [(self.collectors[1].id, 1, Decimal('4.00'))])
+
+    def test_incremental_totals_match_a_rebuild(self):
+        self._collect(self.collectors[0], '4.00')
+        self._collect(self.collectors[0], '2.50')
+        moved = self._collect(self.collectors[1], '1.00')
+        moved.kg = Decimal('3.00')
+        moved.save()
+        self._collect(self.collectors[1], '9.00').delete()
+        incremental = self._totals()
+
+        rebuild()
+
+        self.assertEqual(self._totals(), incremental)
+
+
+class PhotoTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ContentAddressedStorageTests(PhotoTestCase):
+
+    def test_same_bytes_are_stored_once(self):
+        first = photo_storage.save('a.jpg', ContentFile(b'same bytes'))
+        second = photo_storage.save('b.jpg', ContentFile(b'same bytes'))
+
+        self.assertEqual(first, second)
+        directory = first.rsplit('/', 1)[0]
+        self.assertEqual(photo_storage.listdir(directory)[1], [first.rsplit('/', 1)[1]])
+
+
+class SyncTests(PhotoTestCase):
+    """Offline batches are idempotent per client_key and one photo belongs to one collection."""
+
+    def setUp(self):
+        super().setUp()
+        invalidate_rates()
+        self.localbody = _localbody()
+        self.collector = CustomUser.objects.create_user(username='collector', password='x', role=1)
+        self.customer = CustomUser.objects.create_user(username='customer', password='x', role=0)
+
+    def _item(self, client_key, photo):
+        return {
+            'client_key': client_key, 'customer': self.customer.id, 'localbody': self.localbody.id,
+            'ward': '3', 'location': 'Market', 'building_no': '12', 'street_name': 'MG Road',
+            'kg': '2.50', 'photo_upload_id': photo,
+        }
+
+    def _stage(self, name):
+        return photo_storage.save_as(f'{STAGING_DIR}{name}', ContentFile(b'jpeg bytes'))
+
+    def test_resent_client_key_is_reported_as_duplicate(self):
+        photo = self._stage('one')
+        first = sync_collections(self.collector, [self._item('k1', photo)])
+        again = sync_collections(self.collector, [self._item('k1', photo)])
+
+        self.assertEqual(first[0]['status'], 'created')
+        self.assertEqual(again[0], {'client_key': 'k1', 'status': 'duplicate', 'id': first[0]['id']})
+        self.assertEqual(WasteCollection.objects.count(), 1)
+
+    def test_photo_used_twice_in_a_batch_is_rejected(self):
+        photo = self._stage('shared')
+        results = sync_collections(self.collector, [self._item('k1', photo), self._item('k2', photo)])
+
+        self.assertEqual([r['status'] for r in results], ['created', 'invalid'])
+        self.assertIn('photo_upload_id', results[1]['errors'])
+        self.assertEqual(WasteCollection.objects.count(), 1)
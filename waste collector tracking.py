@@ -0,0 +1,162 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from authentication.models import CustomUser
+from .models import CollectorPing
+
+
+MAX_PINGS_PER_REQUEST = 1000
+INSERT_BATCH_SIZE = 500
+# Fixes further in the future than this (clock skew) are rejected
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+# Upper bound on how stale pings ingested by another worker process can be
+POSITION_SNAPSHOT_TTL = getattr(settings, 'COLLECTOR_POSITION_SNAPSHOT_TTL', 30)
+# Collectors with no fix this recent are left off the map
+POSITION_MAX_AGE = timedelta(hours=getattr(settings, 'COLLECTOR_POSITION_MAX_AGE_HOURS', 12))
+
+_lock = threading.Lock()
+_positions = None
+_loaded_at = 0.0
+
+
+def _parse_time(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Epoch seconds, or milliseconds as sent by most mobile runtimes
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+    return None
+
+
+def _parse_ping(collector_id, raw, now):
+    """A CollectorPing from {t, lat, lng[, acc]}, or None if anything is off."""
+    if not isinstance(raw, dict):
+        return None
+    recorded_at = _parse_time(raw.get('t'))
+    try:
+        lat = float(raw['lat'])
+        lng = float(raw['lng'])
+        accuracy = float(raw['acc']) if raw.get('acc') is not None else None
+    except (KeyError, TypeError, ValueError):
+        return None
+    if recorded_at is None or recorded_at > now + MAX_CLOCK_SKEW:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return CollectorPing(
+        collector_id=collector_id, recorded_at=recorded_at,
+        latitude=lat, longitude=lng, accuracy=accuracy,
+    )
+
+
+def ingest_pings(collector, raw_pings):
+    """
+    Append a batch of GPS fixes for one collector with bulk INSERTs.
+    Malformed fixes are dropped. Returns (accepted, rejected).
+    """
+    now = timezone.now()
+    pings = [p for p in (_parse_ping(collector.id, raw, now) for raw in raw_pings) if p is not None]
+    if pings:
+        with transaction.atomic():
+            CollectorPing.objects.bulk_create(pings, batch_size=INSERT_BATCH_SIZE)
+        latest = max(pings, key=lambda p: p.recorded_at)
+        _remember(collector.id, collector.username, latest)
+    return len(pings), len(raw_pings) - len(pings)
+
+
+def _entry(collector_id, username, ping):
+    return {
+        'collector_id': collector_id,
+        'username': username,
+        'latitude': ping.latitude,
+        'longitude': ping.longitude,
+        'accuracy': ping.accuracy,
+        'recorded_at': ping.recorded_at,
+    }
+
+
+def _load_positions():
+    """Latest fix per collector: one query, one index seek on (collector, recorded_at) each."""
+    since = timezone.now() - POSITION_MAX_AGE
+    latest = CollectorPing.objects.filter(
+        collector=OuterRef('pk'), recorded_at__gte=since,
+    ).order_by('-recorded_at')
+    rows = CustomUser.objects.filter(role=1).annotate(
+        ping_at=Subquery(latest.values('recorded_at')[:1]),
+        ping_lat=Subquery(latest.values('latitude')[:1]),
+        ping_lng=Subquery(latest.values('longitude')[:1]),
+        ping_acc=Subquery(latest.values('accuracy')[:1]),
+    ).filter(ping_at__isnull=False).values_list(
+        'id', 'username', 'ping_at', 'ping_lat', 'ping_lng', 'ping_acc'
+    )
+    return {
+        cid: _entry(cid, username, CollectorPing(recorded_at=at, latitude=lat, longitude=lng, accuracy=acc))
+        for cid, username, at, lat, lng, acc in rows
+    }
+
+
+def _remember(collector_id, username, ping):
+    """Fold a freshly ingested fix into this process's snapshot, if it is newer."""
+    with _lock:
+        if _positions is None:
+            return
+        current = _positions.get(collector_id)
+        if current is None or current['recorded_at'] < ping.recorded_at:
+            _positions[collector_id] = _entry(collector_id, username, ping)
+
+
+def latest_positions():
+    """{collector_id: position} from the in-memory snapshot, reloaded at most once per TTL."""
+    global _positions, _loaded_at
+    with _lock:
+        if _positions is None or time.monotonic() - _loaded_at > POSITION_SNAPSHOT_TTL:
+            _positions = _load_positions()
+            _loaded_at = time.monotonic()
+        cutoff = timezone.now() - POSITION_MAX_AGE
+        return {cid: dict(p) for cid, p in _positions.items() if p['recorded_at'] >= cutoff}
+
+
+def compact_tracks(before, since=None, bucket_seconds=60, batch_size=1000):
+    """
+    Thin pings recorded in [since, before) to the first fix per collector per
+    bucket_seconds. Rows are streamed in (collector, recorded_at) order and
+    deleted in batches. Returns (examined, deleted).
+    """
+    pings = CollectorPing.objects.filter(recorded_at__lt=before)
+    if since is not None:
+        pings = pings.filter(recorded_at__gte=since)
+
+    examined = deleted = 0
+    doomed = []
+    last_key = None
+    rows = pings.order_by('collector_id', 'recorded_at', 'id').values_list('id', 'collector_id', 'recorded_at')
+    for ping_id, collector_id, recorded_at in rows.iterator(chunk_size=5000):
+        examined += 1
+        key = (collector_id, int(recorded_at.timestamp()) // bucket_seconds)
+        if key == last_key:
+            doomed.append(ping_id)
+            if len(doomed) >= batch_size:
+                deleted += CollectorPing.objects.filter(id__in=doomed).delete()[0]
+                doomed = []
+        last_key = key
+    if doomed:
+        deleted += CollectorPing.objects.filter(id__in=doomed).delete()[0]
+    return examined, deleted